@@ -14,10 +14,13 @@ sys.path.append(str(Path(__file__).parent.parent))
 import disable_ssl_verification
 from src.config import Config
 from src.chains.faiss_conversational_chain import get_conversational_chain
+from src.utils.logging_config import get_logger
 __import__('pysqlite3')
 import sys
 sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 
+# Initialize logger
+logger = get_logger(__name__)
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -179,7 +182,8 @@ def delete_document(doc_id: str):
         st.session_state.chatbot.delete_documents(doc_id)
         st.toast(f"Removed {doc_id} from knowledge base", icon="🗑️")
         time.sleep(0.5)
-        st.rerun()
+        # Only the sidebar fragment shows the document list
+        st.rerun(scope="fragment")
     except Exception as e:
         st.error(f"Deletion failed: {str(e)}")
 
@@ -221,6 +225,109 @@ def init_session_state():
 # Call the initialization function
 init_session_state()
 
+def format_references(reference_files: list) -> str:
+    """
+    Build the references box markup for an assistant message
+    
+    Args:
+        reference_files: Names of the files the answer drew on
+        
+    Returns:
+        HTML snippet, or an empty string when there are no references
+    """
+    if not reference_files:
+        return ""
+    return f"""
+    <div class="references-box">
+        <b>References:</b><br>
+        {"<br>".join([f"• {f}" for f in reference_files])}
+    </div>
+    """
+
+@st.fragment
+def render_sidebar(document_loader):
+    """
+    Render the sidebar (upload, document list, clear)
+    
+    Runs as a fragment so that sidebar widget events only rerun the sidebar,
+    not the whole chat transcript.
+    """
+    st.markdown("## Personal Knowledge Assistant")
+    st.caption("Intelligent Q&A system built with RAG technology")
+    st.markdown("---")
+    
+    # 1. Document Upload Area
+    st.markdown("### Upload New Document")
+    uploaded_file = st.file_uploader(
+        "Supports PDF, TXT, DOCX, MD",
+        type=["pdf", "txt", "docx", "md"],
+        key="uploaded_file",
+        on_change=upload_document,
+        label_visibility="collapsed"
+    )
+    
+    st.markdown("---")
+    
+    # 2. Document List Area
+    st.markdown("### Knowledge Base Documents")
+    
+    processed_docs = document_loader.list_all_processed_documents()
+    
+    if processed_docs:
+        # Using container to limit height, although Streamlit sidebar has scrolling, this helps with visual layering
+        with st.container():
+            for doc_id in processed_docs:
+                # Filename extraction logic
+                if "UploadedFile" in doc_id:
+                    import re
+                    match = re.search(r"name='([^']+)'", doc_id)
+                    filename = match.group(1) if match else doc_id
+                else:
+                    filename = doc_id.split('/')[-1] if '/' in doc_id else doc_id
+                
+                # Custom HTML card layout
+                col_doc, col_del = st.columns([0.85, 0.15])
+                with col_doc:
+                    st.markdown(
+                        f"""
+                        <div class="doc-card">
+                            <div style="display:flex; align-items:center;">
+                                <span class="doc-icon">📄</span>
+                                <span class="doc-name" title="{filename}">{filename}</span>
+                            </div>
+                        </div>
+                        """, 
+                        unsafe_allow_html=True
+                    )
+                with col_del:
+                    # Vertically center delete button
+                    st.markdown("<div style='height: 8px'></div>", unsafe_allow_html=True)
+                    if st.button("×", key=f"del_{doc_id}", help=f"Delete {filename}", type="secondary"):
+                        delete_document(doc_id)
+    else:
+        st.info("Knowledge base is empty. Please upload documents.")
+    
+    st.markdown("---")
+    
+    # # 3. Settings and Management
+    # with st.expander("Settings and Management"):
+    if "confirm_clear" not in st.session_state:
+        st.session_state.confirm_clear = False
+    
+    if st.session_state.confirm_clear:
+        st.warning("Are you sure you want to clear all documents?")
+        c1, c2 = st.columns(2)
+        if c1.button("Confirm Clear", type="primary", use_container_width=True):
+            clear_knowledge_base()
+            st.session_state.confirm_clear = False
+        if c2.button("Cancel", use_container_width=True):
+            st.session_state.confirm_clear = False
+            st.rerun(scope="fragment")
+    else:
+        if st.button("Clear Knowledge Base", use_container_width=True):
+            st.session_state.confirm_clear = True
+            st.rerun(scope="fragment")
+
 def main():
     """Main function"""
     init_session_state()
@@ -229,82 +336,7 @@ def main():
     
     # --- Sidebar Design ---
     with st.sidebar:
-        st.markdown("## Personal Knowledge Assistant")
-        st.caption("Intelligent Q&A system built with RAG technology")
-        st.markdown("---")
-        
-        # 1. Document Upload Area
-        st.markdown("### Upload New Document")
-        uploaded_file = st.file_uploader(
-            "Supports PDF, TXT, DOCX, MD",
-            type=["pdf", "txt", "docx", "md"],
-            key="uploaded_file",
-            on_change=upload_document,
-            label_visibility="collapsed"
-        )
-        
-        st.markdown("---")
-        
-        # 2. Document List Area
-        st.markdown("### Knowledge Base Documents")
-        
-        processed_docs = document_loader.list_all_processed_documents()
-        
-        if processed_docs:
-            # Using container to limit height, although Streamlit sidebar has scrolling, this helps with visual layering
-            with st.container():
-                for doc_id in processed_docs:
-                    # Filename extraction logic
-                    if "UploadedFile" in doc_id:
-                        import re
-                        match = re.search(r"name='([^']+)'", doc_id)
-                        filename = match.group(1) if match else doc_id
-                    else:
-                        filename = doc_id.split('/')[-1] if '/' in doc_id else doc_id
-                    
-                    # Custom HTML card layout
-                    col_doc, col_del = st.columns([0.85, 0.15])
-                    with col_doc:
-                        st.markdown(
-                            f"""
-                            <div class="doc-card">
-                                <div style="display:flex; align-items:center;">
-                                    <span class="doc-icon">📄</span>
-                                    <span class="doc-name" title="{filename}">{filename}</span>
-                                </div>
-                            </div>
-                            """, 
-                            unsafe_allow_html=True
-                        )
-                    with col_del:
-                        # Vertically center delete button
-                        st.markdown("<div style='height: 8px'></div>", unsafe_allow_html=True)
-                        if st.button("×", key=f"del_{doc_id}", help=f"Delete {filename}", type="secondary"):
-                            delete_document(doc_id)
-        else:
-            st.info("Knowledge base is empty. Please upload documents.")
-        
-        st.markdown("---")
-        
-        # # 3. Settings and Management
-        # with st.expander("Settings and Management"):
-        if "confirm_clear" not in st.session_state:
-            st.session_state.confirm_clear = False
-        
-        if st.session_state.confirm_clear:
-            st.warning("Are you sure you want to clear all documents?")
-            c1, c2 = st.columns(2)
-            if c1.button("Confirm Clear", type="primary", use_container_width=True):
-                clear_knowledge_base()
-                st.session_state.confirm_clear = False
-            if c2.button("Cancel", use_container_width=True):
-                st.session_state.confirm_clear = False
-                st.rerun()
-        else:
-            if st.button("Clear Knowledge Base", use_container_width=True):
-                st.session_state.confirm_clear = True
-                st.rerun()
-            
+        render_sidebar(document_loader)
     
     # --- Main Chat Interface ---
     st.title("Intelligent Conversation Assistant")
@@ -337,20 +369,10 @@ def main():
             with st.chat_message("assistant"):
                 st.markdown(content)
                 
-                # Display reference sources
-                metadata = message.get("metadata", {})
-                if "reference_files" in metadata and metadata["reference_files"]:
-                    files = metadata["reference_files"]
-                    if files:
-                        st.markdown(
-                            f"""
-                            <div class="references-box">
-                                <b>References:</b><br>
-                                {"<br>".join([f"• {f}" for f in files])}
-                            </div>
-                            """, 
-                            unsafe_allow_html=True
-                        )
+                # Display reference sources (markup is built once when the message is stored)
+                references_html = message.get("metadata", {}).get("references_html")
+                if references_html:
+                    st.markdown(references_html, unsafe_allow_html=True)
     
     
     # Chat input processing
@@ -379,47 +401,10 @@ def main():
                 # with st.spinner("Analyzing documents and generating response..."):
                 
                 # Stream generation
-                print(f"prompt: {prompt}")
-                stream_config = {"configurable": {"thread_id": st.session_state.thread_id}}
-                
-                for chunk in st.session_state.chatbot.agent.stream(
-                    {"messages": [{"role": "user", "content": prompt}]},
-                    config=stream_config,
-                    stream_mode="updates"
-                ):
-                    # Process model messages
-                    if "model" in chunk and "messages" in chunk["model"]:
-                        messages = chunk["model"]["messages"]
-                        if messages:
-                            last = messages[0]
-                            
-                            # Text content
-                            if hasattr(last, "content"):
-                                if isinstance(last.content, list):
-                                    for item in last.content:
-                                        if item.get("type") == "text":
-                                            full_response_buffer += item.get("text", "")
-                                            message_placeholder.markdown(full_response_buffer + "▌")
-                                elif isinstance(last.content, str):
-                                    full_response_buffer += last.content
-                                    message_placeholder.markdown(full_response_buffer + "▌")
-                            
-                            # Tool call hints (optional, not as final reply)
-                            if hasattr(last, "tool_calls") and last.tool_calls:
-                                names = [tc.get("name", "") for tc in last.tool_calls]
-                                # Here you can choose whether to display the tool call process
-                                # For a cleaner interface, you can choose to only print in the backend or display temporary status
-                                # message_placeholder.markdown(full_response_buffer + f"\n\n*Searching knowledge base: {', '.join(names)}...*")
-
-                    # Process tools messages
-                    elif "tools" in chunk and "messages" in chunk["tools"]:
-                        messages = chunk["tools"]["messages"]
-                        if messages:
-                            last = messages[0]
-                            if hasattr(last, "content") and last.content:
-                                # Tool return content is usually for the model to see, direct display may not look good, decide whether to append based on needs
-                                full_response_buffer += last.content
-                                message_placeholder.markdown(full_response_buffer + "▌")
+                logger.debug("Prompt received (%d chars)", len(prompt))
+                for chunk in st.session_state.chatbot.stream(prompt, thread_id=st.session_state.thread_id):
+                    full_response_buffer += chunk
+                    message_placeholder.markdown(full_response_buffer + "▌")
                 
                 # Remove cursor
                 message_placeholder.markdown(full_response_buffer)
@@ -436,23 +421,19 @@ def main():
                             displayed_files.add(file_name)
                             reference_files.append(file_name)
                     
-                    if reference_files:
-                        st.markdown(
-                            f"""
-                            <div class="references-box">
-                                <b>References:</b><br>
-                                {"<br>".join([f"• {f}" for f in reference_files])}
-                            </div>
-                            """, 
-                            unsafe_allow_html=True
-                        )
+                references_html = format_references(reference_files)
+                if references_html:
+                    st.markdown(references_html, unsafe_allow_html=True)
 
                 # Save to history
                 st.session_state.messages.append({
                     "role": "assistant",
                     "content": full_response_buffer,
                     "timestamp": datetime.now().isoformat(),
-                    "metadata": {"reference_files": reference_files}
+                    "metadata": {
+                        "reference_files": reference_files,
+                        "references_html": references_html
+                    }
                 })
                 
             except Exception as e:
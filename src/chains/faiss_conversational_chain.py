@@ -3,21 +3,25 @@ FAISS-based Conversational RAG Chain - Multi-turn dialogue with memory
 Implemented using LangChain Agent
 """
 from langchain_core.documents import Document
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, SystemMessage
 from langchain.agents import create_agent
 from langchain.tools import BaseTool
 from langchain.agents.middleware import SummarizationMiddleware
 # from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.checkpoint.sqlite import SqliteSaver
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 from pathlib import Path
+import re
+import threading
 
 from src.config import Config
 from src.prompts.templates import PromptTemplate
-from src.chat_model import get_chat_model
+from src.chat_model import get_chat_model_cached
 from src.loaders.document_loader import get_document_loader
 from src.vectorstores.faiss_store import get_faiss_vector_store
+from src.vectorstores.batched_retriever import get_batched_retriever
+from src.utils.cache import cache_resource
 from src.utils.logging_config import get_logger
 
 # Initialize logger
@@ -29,6 +33,22 @@ FAISS_INDEX_PATH = Config.FAISS_INDEX_PATH
 # Ensure directory exists
 FAISS_INDEX_PATH.mkdir(parents=True, exist_ok=True)
 
+# Messages that are pure small talk never need the knowledge base, so they skip the agent's
+# tool loop (the thread history is still sent and the turn is still checkpointed)
+SMALL_TALK_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|thx|ok|okay|bye|你好|您好|谢谢|好的|再见)\s*[!.。！~]*\s*$",
+    re.IGNORECASE
+)
+
+def _message_text(message) -> str:
+    """Extract plain text from a message whose content may be a list of content blocks"""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        item.get("text", "") for item in message.content
+        if isinstance(item, dict) and item.get("type") == "text"
+    )
+
 class RetrievalTool(BaseTool):
     """Tool for retrieving documents from vector store"""
     
@@ -43,7 +63,7 @@ class RetrievalTool(BaseTool):
     
     def _run(self, query: str) -> str:
         """Execute retrieval operation"""
-        docs = self.retriever.invoke(query)
+        docs = self.retriever.retrieve(query)
         self.last_docs = docs  # Save retrieved documents
         
         if not docs:
@@ -60,6 +80,10 @@ class RetrievalTool(BaseTool):
 class FAISSConversationalRAGChain:
     """FAISS-based Conversational RAG Chain using Agent implementation"""
     
+    # Clients and the index are shared process-wide, so warming up once is enough
+    _warmed = False
+    _warm_lock = threading.Lock()
+    
     def __init__(self, session_id: str = "default"):
         """
         Initialize
@@ -70,23 +94,21 @@ class FAISSConversationalRAGChain:
         self.session_id = session_id
         
         # LLM
-        self.llm = get_chat_model()
+        self.llm = get_chat_model_cached()
         
         # Load documents from data/documents directory
         self.document_loader = get_document_loader()
         
         # Get FAISS vector store
         self.faiss_store = get_faiss_vector_store()
-        self.retriever = self.faiss_store.get_retriever()
-        
-        # Memory - use simple list to store conversation history
-        self.history = []
         
         # Get prompt
         self.prompt_template = PromptTemplate.template
+        # Built once; prepended to the history for turns that bypass the agent
+        self._static_prefix = [SystemMessage(content=self.prompt_template)]
         
-        # Create retrieval tool
-        self.retrieval_tool = RetrievalTool(self.retriever)
+        # Create retrieval tool; queries are batched with concurrent ones from other sessions
+        self.retrieval_tool = RetrievalTool(get_batched_retriever())
         
         logger.info(f"Initializing conversation chain for session: {self.session_id}")
         import sqlite3
@@ -102,12 +124,13 @@ class FAISSConversationalRAGChain:
         self.agent = create_agent(
             model=self.llm,
             tools=[self.retrieval_tool],
+            system_prompt=self.prompt_template,
             middleware=[
                 sanitize_dangling_tool_middleware,
                 SummarizationMiddleware(
-                    model=get_chat_model(model="claude-sonnet-4-5"),
+                    model=get_chat_model_cached("claude-sonnet-4-5"),
                     max_tokens_before_summary=4000,  # Trigger summarization at 4000 tokens
-                    messages_to_keep=20,  # Keep last 20 messages after summary
+                    messages_to_keep=Config.HISTORY_WINDOW,  # Keep only the last few messages verbatim after summary
                 ),
                 # 调整中间件顺序，确保在模型调用前后正确执行
                 retrieve_similar_history_middleware,  # 在模型调用前获取相关历史
@@ -118,8 +141,69 @@ class FAISSConversationalRAGChain:
             # Use SqliteSaver instead of AsyncSqliteSaver to avoid event loop issues
             checkpointer = SqliteSaver(conn=conn),
         )
+        
+        # Open the embedding/LLM connections and touch the index before the first question
+        threading.Thread(target=self._warm_up, name="chain-warm-up", daemon=True).start()
     
+    def _warm_up(self) -> None:
+        """Run a throwaway retrieval and a 1-token LLM call so the first user turn skips cold-start costs"""
+        with FAISSConversationalRAGChain._warm_lock:
+            if FAISSConversationalRAGChain._warmed:
+                return
+            FAISSConversationalRAGChain._warmed = True
+        
+        try:
+            self.retrieval_tool.retriever.retrieve("warmup")
+            self.llm.invoke([HumanMessage(content="ok")], max_tokens=1)
+            logger.info("✅ Retriever and chat model warmed up")
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up failed: {e}")
     
+    def stream(self, question: str, thread_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream the answer to a question token by token
+        
+        Args:
+            question: User question
+            thread_id: Checkpointer thread ID, defaults to the session ID
+            
+        Yields:
+            Text deltas of the assistant reply
+        """
+        # Sources shown for this turn must come from this turn's retrieval, if any
+        self.retrieval_tool.last_docs = []
+        
+        config = {"configurable": {"thread_id": thread_id or self.session_id}}
+        
+        if SMALL_TALK_PATTERN.match(question):
+            logger.info("Small talk detected, answering without the agent")
+            # "ok" may answer the assistant's last question, so the reply needs the thread history
+            history = self.agent.get_state(config).values.get("messages", [])
+            turn = [HumanMessage(content=question)]
+            reply = []
+            for chunk in self.llm.stream(self._static_prefix + history + turn):
+                text = _message_text(chunk)
+                if text:
+                    reply.append(text)
+                    yield text
+            # Record the turn in the checkpointed thread as if the agent's model node had answered it
+            self.agent.update_state(
+                config, {"messages": turn + [AIMessage(content="".join(reply))]}, as_node="model"
+            )
+            return
+        
+        for chunk, metadata in self.agent.stream(
+            {"messages": [HumanMessage(content=question)]},
+            config=config,
+            stream_mode="messages"
+        ):
+            # Only forward model output; tool results and summarizer calls are not part of the reply
+            if not isinstance(chunk, AIMessageChunk) or metadata.get("langgraph_node") != "model":
+                continue
+            
+            text = _message_text(chunk)
+            if text:
+                yield text
  
     from streamlit.runtime.uploaded_file_manager import UploadedFile
     def add_documents(self, file_path: UploadedFile):
@@ -142,9 +226,6 @@ class FAISSConversationalRAGChain:
         
         # Use FAISS vector store service to add documents
         self.faiss_store.add_documents(chunks)
-        
-        # Update retriever
-        self.retriever = self.faiss_store.get_retriever()
     
     def  delete_documents(self, doc_id: str):
         """
@@ -163,8 +244,11 @@ class FAISSConversationalRAGChain:
         self.document_loader.clear_all_processed_documents()
         self.faiss_store.clear()
 
-# Session management
-_sessions = {}
+# Session management: one chain per session ID, shared across Streamlit reruns
+@cache_resource(show_spinner=False)
+def _create_conversational_chain(session_id: str) -> FAISSConversationalRAGChain:
+    """Create conversation Chain (cached per session ID)"""
+    return FAISSConversationalRAGChain(session_id)
 
 def get_conversational_chain(session_id: str) -> FAISSConversationalRAGChain:
     """Get or create conversation Chain"""
@@ -177,12 +261,8 @@ def get_conversational_chain(session_id: str) -> FAISSConversationalRAGChain:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
     
-    if session_id not in _sessions:
-        _sessions[session_id] = FAISSConversationalRAGChain(session_id)
-    return _sessions[session_id]
+    return _create_conversational_chain(session_id)
 
 def clear_session(session_id: str):
     """Clear session"""
-    if session_id in _sessions:
-        _sessions[session_id].clear_memory()
-        del _sessions[session_id]
+    _create_conversational_chain.clear(session_id)
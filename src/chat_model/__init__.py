@@ -1,6 +1,6 @@
 """
 聊天模型模块
 """
-from .chat_model import get_chat_model, get_chat_model_singleton
+from .chat_model import get_chat_model, get_chat_model_cached, get_chat_model_singleton
 
-__all__ = ["get_chat_model", "get_chat_model_singleton"]
+__all__ = ["get_chat_model", "get_chat_model_cached", "get_chat_model_singleton"]
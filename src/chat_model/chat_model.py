@@ -4,6 +4,7 @@ Chat Model Management
 from langchain_anthropic import ChatAnthropic
 from typing import Optional
 from src.config import Config
+from src.utils.cache import cache_resource
 from src.utils.logging_config import get_logger
 
 # Initialize logger
@@ -37,13 +38,13 @@ def get_chat_model(
         base_url=base_url or Config.ANTHROPIC_BASE_URL,
         temperature=temperature if temperature is not None else Config.TEMPERATURE,
         max_tokens=max_tokens or Config.MAX_TOKENS,
+        streaming=True,
     )
     
     return chat_model
 
 # Global singleton
-_chat_model = None
-
+@cache_resource
 def get_chat_model_singleton() -> ChatAnthropic:
     """
     Get chat model singleton
@@ -51,7 +52,23 @@ def get_chat_model_singleton() -> ChatAnthropic:
     Returns:
         ChatAnthropic singleton instance
     """
-    global _chat_model
-    if _chat_model is None:
-        _chat_model = get_chat_model()
-    return _chat_model
+    return get_chat_model()
+
+# Per-model singletons, so sessions share one client (and connection pool) per model
+@cache_resource
+def _get_chat_model_for(model: str) -> ChatAnthropic:
+    """Create the shared client for a resolved model name"""
+    return get_chat_model(model=model)
+
+def get_chat_model_cached(model: Optional[str] = None) -> ChatAnthropic:
+    """
+    Get shared chat model instance for a model name
+    
+    Args:
+        model: Model name, defaults to the one in configuration
+        
+    Returns:
+        ChatAnthropic instance shared by all callers asking for the same model
+    """
+    # Resolve the default first so get_chat_model_cached() and an explicit default name share a client
+    return _get_chat_model_for(model or Config.ANTHROPIC_MODEL_NAME)
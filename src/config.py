@@ -31,6 +31,18 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_EMBEDDING_API_KEY")
     OPENAI_BASE_URL = os.getenv("OPENAI_EMBEDDING_BASE_URL")
     OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL_NAME", "Qwen3-Embedding-4B")
+    # Vector dimensions of known embedding models, so creating a new store needs no request
+    EMBEDDING_DIMS = {
+        "Qwen3-Embedding-0.6B": 1024,
+        "Qwen3-Embedding-4B": 2560,
+        "Qwen3-Embedding-8B": 4096,
+        "text-embedding-3-small": 1536,
+        "text-embedding-3-large": 3072,
+        "text-embedding-ada-002": 1536,
+    }
+    # Vector dimension of the embedding model; set EMBEDDING_DIM for models not listed above,
+    # otherwise a new store probes it with one embedding request
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM") or EMBEDDING_DIMS.get(OPENAI_EMBEDDING_MODEL, 0))
     
     # General configuration
     TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
@@ -38,14 +50,84 @@ class Config:
     
     # Retrieval configuration
     TOP_K = 5
+    # Candidates fetched from FAISS before MMR re-ranking down to TOP_K
+    TOP_K_FETCH = int(os.getenv("TOP_K_FETCH", "20"))
+    # MMR diversity factor (0 = max diversity, 1 = pure similarity)
+    MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.5"))
     SIMILARITY_THRESHOLD = 0.7
     
+    # FAISS index configuration
+    # The store starts as an exact flat index and is rebuilt with INDEX_FACTORY_STRING
+    # once it holds enough vectors to train the IVF clusters.
+    # Vectors are L2-normalized when added and compared by inner product (cosine similarity).
+    NLIST = int(os.getenv("FAISS_NLIST", "4096"))
+    NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+    # Index presets selected with FAISS_INDEX_TYPE:
+    # - flat: exact search only, never rebuilt
+    # - ivf_sq8 (default): 8-bit scalar codes, a quarter of fp32 with SIMD distance kernels;
+    #   the trained per-dimension range fits well since components lie in [-1, 1]
+    # - hnsw_sq8: HNSW graph over 8-bit codes, no cluster training needed
+    # - ivfpq: 64-byte product codes (48x smaller than 1536-dim fp32) for millions of chunks;
+    #   check that recall@10 stays acceptable
+    # - binary: 1 sign bit per dimension searched by Hamming distance, then the top
+    #   k * RESCORE_MULTIPLIER candidates rescored against the exact fp32 vectors;
+    #   no training, fastest indexing, keeps the fp32 copy for rescoring
+    INDEX_PRESETS = {
+        "flat": "Flat",
+        "ivf_sq8": f"IVF{NLIST},SQ8",
+        "hnsw_sq8": "HNSW32,SQ8",
+        "ivfpq": f"IVF{NLIST},PQ64x8",
+        "binary": "LSH,RFlat",
+    }
+    INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "ivf_sq8")
+    if INDEX_TYPE not in INDEX_PRESETS:
+        raise ValueError(
+            f"Unknown FAISS_INDEX_TYPE {INDEX_TYPE!r}, valid presets: {', '.join(INDEX_PRESETS)}"
+        )
+    # FAISS_INDEX_FACTORY overrides the preset with any faiss.index_factory string
+    INDEX_FACTORY_STRING = os.getenv("FAISS_INDEX_FACTORY") or INDEX_PRESETS[INDEX_TYPE]
+    # HNSW graph parameters, used when the factory string contains HNSW;
+    # HNSW needs no cluster training, so it can take over from the flat index much earlier
+    EF_CONSTRUCTION = int(os.getenv("FAISS_EF_CONSTRUCTION", "128"))
+    EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+    # Candidates per requested result that refine ("RFlat") indexes rescore exactly
+    RESCORE_MULTIPLIER = int(os.getenv("FAISS_RESCORE_MULTIPLIER", "4"))
+    # PQ codebooks have 256 centroids per sub-quantizer and need ~10k training points
+    ANN_MIN_TRAIN_SIZE = int(os.getenv(
+        "FAISS_ANN_MIN_TRAIN_SIZE",
+        str(
+            max(NLIST * 50, 10000) if "PQ" in INDEX_FACTORY_STRING
+            else NLIST * 39 if "IVF" in INDEX_FACTORY_STRING
+            else 10000
+        )
+    ))
+    # Memory-map the inverted lists of a saved IVF index instead of reading them into RAM
+    # (pages load on demand); flat and HNSW indexes are always read fully. Suited to
+    # search-mostly deployments: the first add or delete reads a mapped index fully
+    FAISS_MMAP = os.getenv("FAISS_MMAP", "false").lower() == "true"
+    # Search on GPU when faiss-gpu and a CUDA device are available
+    USE_GPU_FAISS = os.getenv("USE_GPU_FAISS", "false").lower() == "true"
+    # Start loading the embedding client and the saved index in the background at import
+    EAGER_LOAD = os.getenv("EAGER_LOAD", "0") == "1"
+    
+    # Query caching configuration
+    EMBEDDING_CACHE_SIZE = 1024
+    RETRIEVAL_CACHE_SIZE = 1024
+    RETRIEVAL_CACHE_TTL = 300  # seconds
+    # Results of FAISSVectorStore.search / search_with_score, dropped on every store change
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    
+    # Embedding configuration
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+    
     # Chunking configuration
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
     
     # Memory configuration
     MAX_HISTORY_LENGTH = 20
+    # Recent messages kept verbatim after summarization; older turns are folded into the summary
+    HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "6"))
     MEMORY_KEY = "chat_history"
     
     
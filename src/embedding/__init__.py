@@ -1,6 +1,6 @@
 """
 Embedding 模块
 """
-from .embedding import get_embeddings, get_embeddings_singleton
+from .embedding import get_embeddings, get_embeddings_singleton, CachedEmbeddings, query_cache_key
 
-__all__ = ["get_embeddings", "get_embeddings_singleton"]
+__all__ = ["get_embeddings", "get_embeddings_singleton", "CachedEmbeddings", "query_cache_key"]
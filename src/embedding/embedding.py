@@ -1,9 +1,14 @@
 """
 Embedding Model Management
 """
+import hashlib
+import threading
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
-from typing import Optional
+from typing import List, Optional
 from src.config import Config
+from src.utils.cache import cache_resource
 from src.utils.logging_config import get_logger
 
 # Initialize logger
@@ -29,20 +34,96 @@ def get_embeddings(
     return OpenAIEmbeddings(
         model=model or Config.OPENAI_EMBEDDING_MODEL,
         openai_api_key=api_key or Config.OPENAI_API_KEY,
-        base_url=base_url or Config.OPENAI_BASE_URL
+        base_url=base_url or Config.OPENAI_BASE_URL,
+        # Texts per embeddings request when embed_documents is given a long list
+        chunk_size=Config.EMBED_BATCH_SIZE
     )
 
-# Global singleton
-_embeddings = None
+def query_cache_key(text: str) -> str:
+    """
+    Get the cache key of a query
+    
+    Queries differing only in case or surrounding whitespace share a key.
+    
+    Args:
+        text: Query text
+        
+    Returns:
+        Hex digest of the normalized query
+    """
+    return hashlib.blake2b(text.lower().strip().encode("utf-8")).hexdigest()
+
+class CachedEmbeddings(Embeddings):
+    """Embedding wrapper that memoizes query embeddings in an LRU cache"""
+    
+    def __init__(self, embeddings: Embeddings, maxsize: int = None):
+        """
+        Initialize
+        
+        Args:
+            embeddings: Underlying embedding model
+            maxsize: Maximum number of cached queries, defaults to value in configuration
+        """
+        self.embeddings = embeddings
+        self.maxsize = maxsize or Config.EMBEDDING_CACHE_SIZE
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                return list(vector)
+        return None
+    
+    def _put(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._cache[key] = tuple(vector)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents (not cached)"""
+        return self.embeddings.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the cached vector when available"""
+        key = query_cache_key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._put(key, vector)
+        return vector
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several queries, sending only the cache misses in one request
+        
+        Args:
+            texts: Query texts
+            
+        Returns:
+            Query vectors, in input order
+        """
+        keys = [query_cache_key(text) for text in texts]
+        vectors = [self._get(key) for key in keys]
+        misses = [i for i, vector in enumerate(vectors) if vector is None]
+        if misses:
+            embedded = self.embeddings.embed_documents([texts[i] for i in misses])
+            for i, vector in zip(misses, embedded):
+                self._put(keys[i], vector)
+                vectors[i] = vector
+        return vectors
 
-def get_embeddings_singleton() -> OpenAIEmbeddings:
+# Global singleton
+@cache_resource
+def get_embeddings_singleton() -> CachedEmbeddings:
     """
     Get embedding model singleton
     
     Returns:
-        OpenAIEmbeddings singleton instance
+        Embedding singleton instance with query caching
     """
-    global _embeddings
-    if _embeddings is None:
-        _embeddings = get_embeddings()
-    return _embeddings
+    return CachedEmbeddings(get_embeddings())
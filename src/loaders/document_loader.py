@@ -6,6 +6,8 @@ It handles document loading, chunking, metadata addition, and processing state t
 """
 from pathlib import Path
 import os
+import shutil
+import threading
 from typing import List, Optional, Dict, Any
 from langchain_core.documents import Document
 from langchain_community.document_loaders import (
@@ -14,7 +16,8 @@ from langchain_community.document_loaders import (
     TextLoader,
 )
 from src.config import Config
-from src.utils.text_splitter import get_recursive_splitter
+from src.utils.text_splitter import get_adaptive_splitter
+from src.utils.cache import cache_resource
 from src.utils.logging_config import get_logger
 
 # Initialize logger
@@ -43,8 +46,14 @@ class DocumentLoaderService:
     }
     
     def __init__(self):
-        """Initialize document loader service, set up text splitter"""
-        self.text_splitter = get_recursive_splitter()
+        """Initialize document loader service and load processed document record"""
+        # In-memory copy of PROCESSED_DOCS_RECORD for O(1) lookups; the file stays the source of truth on disk
+        self._processed = (
+            set(PROCESSED_DOCS_RECORD.read_text(encoding="utf-8").splitlines())
+            if PROCESSED_DOCS_RECORD.exists() else set()
+        )
+        # Guards the processed set and record file; the loader is shared by all sessions
+        self._record_lock = threading.Lock()
     
     def load_document(self, file_path: str) -> List[Document]:
         """
@@ -86,7 +95,9 @@ class DocumentLoaderService:
         
         # Process into chunks
         logger.info(f"Processing document: {path.name}")
-        chunks = self.text_splitter.split_documents(documents)
+        # Sniff the start of the document to skip CJK separators for plain texts
+        sample = documents[0].page_content[:4096] if documents else ""
+        chunks = get_adaptive_splitter(sample).split_documents(documents)
         logger.info(f"Document split into {len(chunks)} chunks")
         return chunks
     
@@ -119,16 +130,30 @@ class DocumentLoaderService:
         # Create target file path
         file_path1 = Config.DOCUMENTS_DIR / file_path.name
         
-        # Save file
+        # Save file, copying in 64 KB blocks instead of materializing the whole upload
+        file_path.seek(0)
         with open(file_path1, "wb") as f:
-            f.write(file_path.getbuffer())
+            shutil.copyfileobj(file_path, f, length=1 << 16)
         
         logger.info(f"✓ Uploaded file saved to: {file_path1}")
         
-        logger.info(f"Loading file: {file_path1.name}")
+        return self._load_and_record(file_path1, doc_id)
+    
+    def _load_and_record(self, path: Path, doc_id: str) -> List[Document]:
+        """
+        Load a file from disk and record it as processed
+        
+        Args:
+            path: File path
+            doc_id: Document identifier to record
+        
+        Returns:
+            List of Document objects (chunked), empty on failure
+        """
+        logger.info(f"Loading file: {path.name}")
         try:
             # Load and process document
-            chunks = self.load_document(str(file_path1))
+            chunks = self.load_document(str(path))
             
             # Record processed document
             self._record_processed_document(doc_id)
@@ -149,11 +174,7 @@ class DocumentLoaderService:
         Returns:
             Whether it has been processed
         """
-        if not PROCESSED_DOCS_RECORD.exists():
-            return False
-        with open(PROCESSED_DOCS_RECORD, "r", encoding="utf-8") as f:
-            processed_ids = f.read().splitlines()
-        return doc_id in processed_ids
+        return doc_id in self._processed
     
     def _record_processed_document(self, doc_id: str) -> None:
         """
@@ -162,8 +183,10 @@ class DocumentLoaderService:
         Args:
             doc_id: Document identifier (typically file path)
         """
-        with open(PROCESSED_DOCS_RECORD, "a", encoding="utf-8") as f:
-            f.write(f"{doc_id}\n")
+        with self._record_lock:
+            self._processed.add(doc_id)
+            with open(PROCESSED_DOCS_RECORD, "a", encoding="utf-8") as f:
+                f.write(f"{doc_id}\n")
     
     def batch_process_documents(self, documents: List[Document], batch_size: int = 10) -> List[List[Document]]:
         """
@@ -205,23 +228,27 @@ class DocumentLoaderService:
         else:
             logger.warning(f"Document not found: {doc_id}")
 
-        processed_ids = self.list_all_processed_documents()
-        if doc_id in processed_ids:
-            processed_ids.remove(doc_id)
-        else:
-            logger.warning(f"Document not found in list of processed documents: {doc_id}")
-        with open(PROCESSED_DOCS_RECORD, "w", encoding="utf-8") as f:
-            f.write("\n".join(processed_ids))
+        with self._record_lock:
+            self._processed.discard(doc_id)
+            processed_ids = self.list_all_processed_documents()
+            if doc_id in processed_ids:
+                processed_ids.remove(doc_id)
+            else:
+                logger.warning(f"Document not found in list of processed documents: {doc_id}")
+            with open(PROCESSED_DOCS_RECORD, "w", encoding="utf-8") as f:
+                f.writelines(f"{processed_id}\n" for processed_id in processed_ids)
 
     def clear_all_processed_documents(self) -> None:
         """
         Delete all processed documents
         """
-        try:
-            PROCESSED_DOCS_RECORD.open("w").close()
-            logger.info(f"Successfully cleared {PROCESSED_DOCS_RECORD}")
-        except Exception as e:
-            logger.error(f"Failed to clear file contents of {PROCESSED_DOCS_RECORD}: {e}")
+        with self._record_lock:
+            self._processed.clear()
+            try:
+                PROCESSED_DOCS_RECORD.open("w").close()
+                logger.info(f"Successfully cleared {PROCESSED_DOCS_RECORD}")
+            except Exception as e:
+                logger.error(f"Failed to clear file contents of {PROCESSED_DOCS_RECORD}: {e}")
         try:
             for file in Path(Config.DOCUMENTS_DIR).glob("*"):
                 if file.is_file():
@@ -230,8 +257,7 @@ class DocumentLoaderService:
         except Exception as e:
             logger.error(f"Failed to clear directory {Config.DOCUMENTS_DIR}: {e}")
 # Global singleton instance
-_LOADER_INSTANCE = None
-
+@cache_resource
 def get_document_loader() -> DocumentLoaderService:
     """
     Get document loader singleton instance
@@ -239,10 +265,7 @@ def get_document_loader() -> DocumentLoaderService:
     Returns:
         DocumentLoaderService instance
     """
-    global _LOADER_INSTANCE
-    if _LOADER_INSTANCE is None:
-        _LOADER_INSTANCE = DocumentLoaderService()
-    return _LOADER_INSTANCE
+    return DocumentLoaderService()
 
 def is_document_processed(doc_id: str) -> bool:
     """
@@ -10,6 +10,8 @@ class PromptTemplate:
     2. Prioritize using retrieved document content
     3. Politely ask for clarification when needed
     4. Maintain conversational coherence and friendliness
+    5. Only call `retrieval_tool` if the user question requires knowledge-base facts;
+       do not call it for greetings, clarifications, or summaries of prior turns
 
     Answer:"""
     
@@ -0,0 +1,60 @@
+"""
+Resource Caching Utilities
+
+Shares expensive objects (model clients, vector stores, conversation chains) across
+Streamlit script reruns and sessions. Falls back to a plain in-process cache when
+Streamlit is not installed, so non-UI callers keep working.
+"""
+import functools
+import threading
+from typing import Any, Callable, Optional
+
+try:
+    import streamlit as st
+except ImportError:
+    st = None
+
+
+def cache_resource(func: Optional[Callable] = None, **kwargs: Any) -> Callable:
+    """
+    Cache the return value of a resource factory
+
+    Can be used as @cache_resource or @cache_resource(show_spinner=False).
+
+    Args:
+        func: Factory function to cache
+        **kwargs: Extra options passed to st.cache_resource
+
+    Returns:
+        Cached function exposing clear(*args, **kwargs) to drop one entry or the whole cache
+    """
+    if func is None:
+        return lambda f: cache_resource(f, **kwargs)
+
+    if st is not None:
+        return st.cache_resource(func, **kwargs)
+
+    cache = {}
+    # Serializes creation so concurrent first calls (e.g. the eager preload thread) share one instance
+    lock = threading.RLock()
+
+    def make_key(args: tuple, kwargs: dict) -> tuple:
+        return args, tuple(sorted(kwargs.items()))
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = make_key(args, kwargs)
+        with lock:
+            if key not in cache:
+                cache[key] = func(*args, **kwargs)
+            return cache[key]
+
+    def clear(*args, **kwargs):
+        with lock:
+            if args or kwargs:
+                cache.pop(make_key(args, kwargs), None)
+            else:
+                cache.clear()
+
+    wrapper.clear = clear
+    return wrapper
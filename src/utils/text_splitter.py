@@ -1,6 +1,9 @@
 """
 Text Splitting Utilities
 """
+import re
+from functools import lru_cache
+
 from langchain_text_splitters import (
     RecursiveCharacterTextSplitter,
     CharacterTextSplitter,
@@ -12,18 +15,38 @@ from src.utils.logging_config import get_logger
 # Initialize logger
 logger = get_logger(__name__)
 
-def get_recursive_splitter():
+# Separators for texts that may contain Chinese sentence punctuation
+CJK_SEPARATORS = ["\n\n", "\n", "。", "！", "？", ".", "!", "?", " ", ""]
+# Shorter list for texts without CJK characters: fewer fall-through passes per chunk
+PLAIN_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+
+@lru_cache(maxsize=None)
+def get_recursive_splitter(cjk: bool = True):
     """
     Get recursive character splitter
     Suitable for most texts, attempts to split at natural boundaries like paragraphs and sentences
+    
+    Args:
+        cjk: Include Chinese sentence punctuation in the separators
     """
     return RecursiveCharacterTextSplitter(
         chunk_size=Config.CHUNK_SIZE,
         chunk_overlap=Config.CHUNK_OVERLAP,
-        separators=["\n\n", "\n", "。", "！", "？", ".", "!", "?", " ", ""],
+        separators=CJK_SEPARATORS if cjk else PLAIN_SEPARATORS,
         length_function=len,
     )
 
+def get_adaptive_splitter(sample: str):
+    """
+    Get the recursive splitter best suited to a text
+    
+    Args:
+        sample: Beginning of the text, used to detect CJK content
+    """
+    return get_recursive_splitter(bool(CJK_PATTERN.search(sample)))
+
 def get_character_splitter():
     """
     Get simple character splitter
@@ -36,10 +59,12 @@ def get_character_splitter():
         length_function=len,
     )
 
+@lru_cache(maxsize=None)
 def get_token_splitter(encoding_name="cl100k_base"):
     """
     Get token-based splitter
     Suitable for scenarios requiring precise token count control
+    The splitter (and its tiktoken encoder) is built once per encoding and reused
     
     Args:
         encoding_name: Encoding name, defaults to OpenAI's cl100k_base
@@ -2,5 +2,6 @@
 向量存储模块
 """
 from .faiss_store import FAISSVectorStore, get_faiss_vector_store
+from .batched_retriever import BatchedRetriever, get_batched_retriever
 
-__all__ = ["FAISSVectorStore", "get_faiss_vector_store"]
+__all__ = ["FAISSVectorStore", "get_faiss_vector_store", "BatchedRetriever", "get_batched_retriever"]
@@ -0,0 +1,136 @@
+"""
+Batched Retriever
+
+Coalesces concurrent retrieval requests (parallel tool calls, several chat sessions)
+into a single embedding request and a single FAISS search.
+Requests are buffered for a short window; each caller blocks until its own results are ready.
+Results are cached per normalized query for a few minutes and dropped when the store changes.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional
+
+from langchain_core.documents import Document
+
+from src.config import Config
+from src.embedding import query_cache_key
+from src.utils.cache import cache_resource
+from src.utils.logging_config import get_logger
+from src.vectorstores.faiss_store import FAISSVectorStore, get_faiss_vector_store
+
+# Initialize logger
+logger = get_logger(__name__)
+
+class BatchedRetriever:
+    """Retriever that batches concurrent queries against a FAISS vector store"""
+
+    def __init__(
+        self,
+        store: FAISSVectorStore,
+        k: Optional[int] = None,
+        batch_window_ms: int = 10,
+        batch_max: int = 16
+    ):
+        """
+        Initialize batched retriever
+
+        Args:
+            store: FAISS vector store to search
+            k: Number of documents to retrieve per query, defaults to value in configuration
+            batch_window_ms: How long to wait for more queries after the first one arrives
+            batch_max: Maximum number of queries per batch
+        """
+        self.store = store
+        self.k = k or Config.TOP_K
+        self.batch_window = batch_window_ms / 1000
+        self.batch_max = batch_max
+
+        # query key -> (expiry time, store version, documents)
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="batched-retriever", daemon=True)
+        self._worker.start()
+
+    def retrieve(self, query: str) -> List[Document]:
+        """
+        Retrieve relevant documents for a query
+
+        Args:
+            query: Query text
+
+        Returns:
+            List of relevant documents
+        """
+        key = query_cache_key(query)
+        # Read before searching: the store bumps its version only after a change is complete,
+        # so results are never older than the version they are cached under
+        version = self.store.version
+        with self._results_lock:
+            cached = self._results.get(key)
+            if cached and cached[0] > time.monotonic() and cached[1] == version:
+                self._results.move_to_end(key)
+                return list(cached[2])
+
+        future = Future()
+        self._queue.put((query, future))
+        docs = future.result()
+
+        with self._results_lock:
+            self._results[key] = (time.monotonic() + Config.RETRIEVAL_CACHE_TTL, version, docs)
+            self._results.move_to_end(key)
+            if len(self._results) > Config.RETRIEVAL_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return list(docs)
+
+    # Same entry point as a LangChain retriever
+    invoke = retrieve
+
+    def _collect_batch(self) -> list:
+        """Block for the first request, then gather more until the window closes or the batch is full"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_max:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        """Worker loop: search each batch in one call and hand results back to the callers"""
+        while True:
+            batch = self._collect_batch()
+            queries = [query for query, _ in batch]
+            try:
+                results = self.store.search_batch(queries, k=self.k)
+            except Exception as e:
+                logger.error(f"⚠️ Batched retrieval failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            logger.debug("Retrieved batch of %d queries", len(batch))
+            for (_, future), docs in zip(batch, results):
+                future.set_result(docs)
+
+
+# Global singleton
+@cache_resource
+def get_batched_retriever() -> BatchedRetriever:
+    """
+    Get batched retriever singleton
+    
+    A single instance is shared so that queries from all sessions can be coalesced.
+    
+    Returns:
+        BatchedRetriever singleton instance
+    """
+    return BatchedRetriever(get_faiss_vector_store())
@@ -4,20 +4,37 @@ FAISS Vector Store Management
 This module provides a unified management interface for FAISS vector storage, including creation, loading, updating, and querying.
 FAISS is an efficient vector similarity search library used to store document vector representations and perform fast retrieval.
 """
-import uuid
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Set, Union
 import hashlib
 
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy, maximal_marginal_relevance
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
 
 from src.config import Config
 from src.embedding import get_embeddings, get_embeddings_singleton
-from src.loaders.document_loader import get_document_loader
+from src.utils.cache import cache_resource
 from src.utils.logging_config import get_logger
+from src.utils.rwlock import ReadWriteLock
+from src.vectorstores.mmap_docstore import (
+    METADATA_FILE, OFFSETS_FILE, TEXTS_FILE, MmapDocstore, write_mmap_docstore
+)
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -28,6 +45,255 @@ FAISS_INDEX_PATH = Config.FAISS_INDEX_PATH
 # Ensure directory exists
 FAISS_INDEX_PATH.mkdir(parents=True, exist_ok=True)
 
+# Each save writes a new "store-*" directory; this file names the current one, and replacing
+# it switches all files over at once
+CURRENT_FILE = "CURRENT"
+STORE_DIR_PREFIX = "store-"
+# Source hash -> file name side-table written by earlier versions
+SOURCE_MAP_FILE = "sources.json"
+# Inverted index of source hash -> chunk IDs, saved next to the index
+SOURCE_INDEX_FILE = "source_index.json"
+# Chunks as JSON lines in index position order (id, page_content, metadata), written by earlier versions
+DOCSTORE_FILE = "docstore.jsonl"
+# Pickled (docstore, index_to_docstore_id) written by FAISS.save_local in earlier versions
+LEGACY_DOCSTORE_FILE = "index.pkl"
+# Files written directly into FAISS_INDEX_PATH by earlier versions, removed by the next save
+LEGACY_FILES = (
+    "index.faiss", LEGACY_DOCSTORE_FILE, DOCSTORE_FILE, SOURCE_MAP_FILE,
+    TEXTS_FILE, OFFSETS_FILE, METADATA_FILE,
+)
+
+def source_hash(source: str) -> str:
+    """
+    Get the fixed-width hash that prefixes the IDs of a source's chunks
+    
+    Args:
+        source: Source file name
+        
+    Returns:
+        16 hex characters (8-byte blake2b digest)
+    """
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=8).hexdigest()
+
+def chunk_id(source: str, content: str) -> str:
+    """
+    Get the content-addressed ID of a chunk
+    
+    The same chunk of the same source always gets the same ID, so re-adding it is detectable.
+    
+    Args:
+        source: Source file name
+        content: Chunk text
+        
+    Returns:
+        32 hex characters: source hash followed by an 8-byte blake2b digest of the chunk
+    """
+    digest = hashlib.blake2b(f"{source}\0{content}".encode("utf-8"), digest_size=8).hexdigest()
+    return f"{source_hash(source)}{digest}"
+
+def _chunk_source_key(id: str, metadata: dict) -> str:
+    """
+    Get the source hash a chunk is filed under in the inverted index
+    
+    Args:
+        id: Document ID
+        metadata: Chunk metadata
+        
+    Returns:
+        16-hex hash of the chunk's file_name
+    """
+    source = metadata.get("file_name")
+    if source is None and "_" in id:
+        # Chunks saved without metadata by early versions have "<file name>_<uuid>" IDs
+        source = id.rsplit("_", 1)[0]
+    return source_hash(source or "")
+
+def _to_f32(vectors) -> np.ndarray:
+    """
+    Convert embeddings to the C-contiguous float32 matrix FAISS expects
+    
+    Arrays that already have that layout are returned as is, so FAISS makes no hidden copy.
+    
+    Args:
+        vectors: Embeddings as a list of lists or an array
+        
+    Returns:
+        C-contiguous float32 array
+    """
+    if isinstance(vectors, np.ndarray) and vectors.dtype == np.float32 and vectors.flags["C_CONTIGUOUS"]:
+        return vectors
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+def _supports_removal(index: faiss.Index) -> bool:
+    """
+    Whether _remove_positions can delete from an index in place
+    
+    Args:
+        index: CPU FAISS index
+        
+    Returns:
+        False for graph indexes (HNSW), which cannot remove vectors
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPreTransform):
+        return _supports_removal(index.index)
+    if isinstance(index, faiss.IndexRefine):
+        return _supports_removal(index.base_index) and _supports_removal(index.refine_index)
+    return isinstance(index, (faiss.IndexIVF, faiss.IndexFlatCodes))
+
+def _remove_positions(index: faiss.Index, positions: np.ndarray) -> None:
+    """
+    Remove vectors by position, renumbering the rest to stay contiguous
+    
+    The LangChain wrapper maps result labels to chunks by position. Flat-code indexes
+    compact on removal; IVF indexes keep their labels, so the ids stored in the inverted
+    lists are shifted down instead. Stored codes are left untouched, so quantized vectors
+    are not re-encoded. Check _supports_removal first.
+    
+    Args:
+        index: CPU FAISS index
+        positions: Sorted int64 positions to remove
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPreTransform):
+        _remove_positions(index.index, positions)
+        index.ntotal = index.index.ntotal
+    elif isinstance(index, faiss.IndexRefine):
+        _remove_positions(index.base_index, positions)
+        _remove_positions(index.refine_index, positions)
+        index.ntotal = index.base_index.ntotal
+    elif isinstance(index, faiss.IndexIVF):
+        # remove_ids rejects the array direct map; it is rebuilt once labels are positions again
+        index.make_direct_map(False)
+        index.remove_ids(positions)
+        invlists = index.invlists
+        for list_no in range(index.nlist):
+            size = invlists.list_size(list_no)
+            if not size:
+                continue
+            ids = faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy()
+            codes = faiss.rev_swig_ptr(invlists.get_codes(list_no), size * invlists.code_size).copy()
+            ids -= np.searchsorted(positions, ids)
+            invlists.update_entries(list_no, 0, size, faiss.swig_ptr(ids), faiss.swig_ptr(codes))
+        index.make_direct_map()
+    else:
+        index.remove_ids(positions)
+
+def _prefetch_file(path: Path) -> None:
+    """
+    Ask the OS to read a file into the page cache ahead of use
+    
+    Args:
+        path: File to prefetch
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logger.debug("Prefetch of %s failed: %s", path, e)
+
+def _saved_store_dir(base: Optional[Path] = None) -> Optional[Path]:
+    """
+    Find the directory holding the current saved store
+    
+    Args:
+        base: Vector store path, defaults to path in configuration
+        
+    Returns:
+        Store directory, or None if nothing was saved yet
+    """
+    base = Path(base or FAISS_INDEX_PATH)
+    pointer = base / CURRENT_FILE
+    if pointer.exists():
+        store_dir = base / pointer.read_text(encoding="utf-8").strip()
+        if (store_dir / "index.faiss").exists():
+            return store_dir
+    # Stores saved by earlier versions keep their files directly in the base directory
+    if (base / "index.faiss").exists():
+        return base
+    return None
+
+def _read_saved_store(store_dir: Optional[Path] = None) -> tuple:
+    """
+    Read the saved index, docstore and ID map from disk
+    
+    With FAISS_MMAP the inverted lists of an IVF index are memory-mapped and the file is
+    prefetched in the background; faiss reads other index types fully either way. Chunk texts are always memory-mapped; older docstore formats are read fully into memory.
+    
+    Args:
+        store_dir: Store directory, defaults to the current one
+        
+    Returns:
+        Tuple of (index, docstore, index_to_docstore_id, whether the index is memory-mapped,
+        store directory)
+        
+    Raises:
+        ValueError: If the index and the docstore hold different numbers of chunks
+    """
+    store_dir = store_dir or _saved_store_dir()
+    io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if Config.FAISS_MMAP else 0
+    index = faiss.read_index(str(store_dir / "index.faiss"), io_flags)
+    # Only IVF inverted lists are mapped; flat and HNSW indexes were read fully and stay writable
+    mmapped = bool(io_flags) and faiss.try_extract_index_ivf(index) is not None
+    if mmapped:
+        # Warm the page cache in the background so early searches rarely fault to disk
+        threading.Thread(
+            target=_prefetch_file, args=(store_dir / "index.faiss",), daemon=True
+        ).start()
+    
+    if (store_dir / TEXTS_FILE).exists():
+        docstore = MmapDocstore(store_dir)
+        index_to_docstore_id = dict(enumerate(docstore.ids))
+    elif (store_dir / DOCSTORE_FILE).exists():
+        documents = {}
+        index_to_docstore_id = {}
+        with open(store_dir / DOCSTORE_FILE, encoding="utf-8") as f:
+            for position, line in enumerate(f):
+                record = json.loads(line)
+                documents[record["id"]] = Document(
+                    id=record["id"], page_content=record["page_content"], metadata=record["metadata"]
+                )
+                index_to_docstore_id[position] = record["id"]
+        docstore = InMemoryDocstore(documents)
+    else:
+        # Store saved by an earlier version; rewritten in the new format on the next save
+        with open(store_dir / LEGACY_DOCSTORE_FILE, "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+    
+    # Positions would map to the wrong chunks, e.g. after a crash while saving with an earlier version
+    if index.ntotal != len(index_to_docstore_id):
+        raise ValueError(
+            f"Index holds {index.ntotal} vectors but the docstore {len(index_to_docstore_id)} chunks"
+        )
+    return index, docstore, index_to_docstore_id, mmapped, store_dir
+
+# Results of the EAGER_LOAD background tasks, consumed once by the first store instance
+_preload_futures: Dict[str, Future] = {}
+
+def _take_preloaded(name: str) -> Any:
+    """
+    Wait for and take the result of a background preload task
+    
+    Args:
+        name: Task name ("embeddings" or "store")
+        
+    Returns:
+        Task result, or None if the task was not started or failed
+    """
+    future = _preload_futures.pop(name, None)
+    if future is None:
+        return None
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning(f"⚠️ Preloading {name} failed: {e}, loading synchronously")
+        return None
+
 class FAISSVectorStore:
     """FAISS Vector Store Management Class"""
     
@@ -38,8 +304,37 @@ class FAISSVectorStore:
         Args:
             embeddings: Embedding model, defaults to global singleton
         """
-        self.embeddings = embeddings or get_embeddings_singleton()
+        self.embeddings = embeddings or _take_preloaded("embeddings") or get_embeddings_singleton()
+        # Searches hold the read side; changes to the index, docstore and ID maps hold the write side
+        self._lock = ReadWriteLock()
+        # Serializes whole mutations (adds, deletes, saves), including their slow embedding and I/O
+        # phases, during which searches keep running
+        self._mutation_lock = threading.RLock()
+        self._gpu_resources = None
+        self._on_gpu = False
+        # Full-precision CPU copy kept while the index is on GPU, for reconstruct and mutations
+        self._cpu_index = None
+        # GPU indexes are not safe for concurrent use, so GPU searches are serialized
+        self._gpu_search_lock = threading.Lock()
+        # True while the index is a read-only memory map of the saved file
+        self._mmapped = False
+        # Directory of the store that was loaded or last saved
+        self._store_dir: Optional[Path] = None
         self.vector_store = self._load_or_create_vector_store()
+        self.vector_store.index = self._to_gpu(self.vector_store.index)
+        # Chunk IDs are <source hash><content hash>, 16 hex characters each
+        # Source hash -> chunk IDs, so deleting a source does not scan every ID in the store
+        self._source_to_ids: Dict[str, Set[str]] = self._load_source_index()
+        # Bumped on every mutation so that cached retrieval results can detect staleness
+        self.version = 0
+        # Set by mutations that were not flushed to disk yet
+        self._dirty = False
+        # Per-thread query buffer, reused for every single-query search instead of allocating a
+        # new array per query; per thread so concurrent searches need no lock around it
+        self._query_local = threading.local()
+        # (query, k, version) -> ((doc ID, score), ...); cleared by _mark_changed. The version in
+        # the key keeps a search that raced with a mutation from being served after it
+        self._search_cached = lru_cache(maxsize=Config.QUERY_CACHE_SIZE)(self._raw_search)
     
     def _load_or_create_vector_store(self) -> FAISS:
         """
@@ -51,26 +346,328 @@ class FAISSVectorStore:
             FAISS vector store instance
         """
         # Check if saved vector store exists
-        if FAISS_INDEX_PATH.exists() and any(FAISS_INDEX_PATH.iterdir()):
+        if _saved_store_dir() is not None:
             try:
                 logger.info(f"✅ Loading existing vector store (path: {FAISS_INDEX_PATH})")
-                vector_store = FAISS.load_local(
-                    folder_path=str(FAISS_INDEX_PATH),
-                    embeddings=self.embeddings,
-                    allow_dangerous_deserialization=True
+                index, docstore, index_to_docstore_id, self._mmapped, self._store_dir = (
+                    _take_preloaded("store") or _read_saved_store()
+                )
+                # Not saved with the index; stores created before the switch to inner product stay L2
+                distance_strategy = (
+                    DistanceStrategy.MAX_INNER_PRODUCT
+                    if index.metric_type == faiss.METRIC_INNER_PRODUCT
+                    else DistanceStrategy.EUCLIDEAN_DISTANCE
                 )
+                vector_store = FAISS(
+                    self.embeddings, index, docstore, index_to_docstore_id,
+                    distance_strategy=distance_strategy
+                )
+                self._configure_index(vector_store.index)
                 return vector_store
             except Exception as e:
                 logger.warning(f"⚠️ Failed to load vector store: {e}, will create a new one")
         
         # If no documents, create an empty vector store
         logger.warning("⚠️ No existing vector store found or loading failed, creating empty vector store")
-        vector_store = FAISS.from_texts(
-            ["初始化文档"], self.embeddings
+        # No placeholder document: it would be returned for unrelated queries on small corpora
+        dim = Config.EMBEDDING_DIM or len(self.embeddings.embed_query("dim probe"))
+        vector_store = FAISS(
+            self.embeddings, faiss.IndexFlatIP(dim), InMemoryDocstore(), {},
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
         )
-        vector_store.save_local(str(FAISS_INDEX_PATH))
+        # Not saved here: the first real add (or delete/clear) persists the store
         return vector_store
     
+    def _source_key(self, id: str) -> str:
+        """
+        Get the source hash a chunk is filed under in the inverted index
+        
+        Looks up the chunk's metadata, so chunks added with caller-supplied IDs are
+        filed the same way as in add_documents.
+        
+        Args:
+            id: Document ID
+            
+        Returns:
+            16-hex source hash
+        """
+        doc = self.vector_store.docstore.search(id)
+        return _chunk_source_key(id, doc.metadata if isinstance(doc, Document) else {})
+    
+    def _load_source_index(self) -> Dict[str, Set[str]]:
+        """
+        Load the source hash -> chunk IDs inverted index saved with the index
+        
+        Stores saved before it was persisted are indexed with one pass over the docstore.
+        
+        Returns:
+            Inverted index
+        """
+        source_to_ids = defaultdict(set)
+        path = self._store_dir / SOURCE_INDEX_FILE if self._store_dir is not None else None
+        if path is not None and path.exists():
+            try:
+                for key, ids in json.loads(path.read_text(encoding="utf-8")).items():
+                    source_to_ids[key] = set(ids)
+                return source_to_ids
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to load source index: {e}, rebuilding it")
+                source_to_ids.clear()
+        
+        for id in self.vector_store.index_to_docstore_id.values():
+            source_to_ids[self._source_key(id)].add(id)
+        return source_to_ids
+    
+    @property
+    def dim(self) -> int:
+        """Embedding dimension, read from the index so no probe embedding request is needed"""
+        return self.vector_store.index.d
+    
+    def _normalizes(self) -> bool:
+        """Whether vectors are L2-normalized and compared by inner product (cosine similarity)"""
+        return self.vector_store.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT
+    
+    def _mark_changed(self) -> None:
+        """
+        Record a mutation: bump the version, mark unsaved and drop cached search results
+        
+        Called under the write lock after the change is applied, so a reader that sees the
+        new version also sees the changed store.
+        """
+        self.version += 1
+        self._dirty = True
+        self._search_cached.cache_clear()
+    
+    def _ensure_writable(self) -> None:
+        """
+        Replace a memory-mapped index with a fully loaded copy before it is modified
+        
+        Memory-mapped IVF lists reject adds, so the saved file (identical to the mapped
+        index) is read into RAM. Must be called with the index on CPU.
+        """
+        if not self._mmapped:
+            return
+        logger.info("Loading memory-mapped index into RAM for modification")
+        index = faiss.read_index(str(self._store_dir / "index.faiss"))
+        self._configure_index(index)
+        with self._lock.write():
+            self.vector_store.index = index
+            self._mmapped = False
+    
+    def _configure_index(self, index: faiss.Index) -> None:
+        """
+        Apply search-time parameters to an index
+        
+        Args:
+            index: FAISS index
+        """
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = Config.NPROBE
+            # MMR retrieval reconstructs candidate vectors by position
+            ivf.make_direct_map()
+        hnsw = self._extract_hnsw(index)
+        if hnsw is not None:
+            hnsw.efSearch = Config.EF_SEARCH
+        refine = faiss.downcast_index(index)
+        if isinstance(refine, faiss.IndexRefine):
+            refine.k_factor = Config.RESCORE_MULTIPLIER
+    
+    def _index_factory(self, d: int, metric: int) -> faiss.Index:
+        """
+        Create an empty index from INDEX_FACTORY_STRING
+        
+        faiss.index_factory only builds LSH for L2, so binary codes with exact rescoring
+        ("LSH,RFlat") are assembled by hand for inner-product stores: sign bits do not
+        depend on the metric, and the fp32 rescoring stage uses inner product.
+        
+        Args:
+            d: Vector dimension
+            metric: FAISS metric type
+            
+        Returns:
+            Untrained index
+        """
+        if Config.INDEX_FACTORY_STRING != "LSH,RFlat" or metric == faiss.METRIC_L2:
+            return faiss.index_factory(d, Config.INDEX_FACTORY_STRING, metric)
+        
+        lsh = faiss.IndexLSH(d, d, False, False)  # 1 bit per dimension, sign threshold
+        lsh.metric_type = metric
+        index = faiss.IndexRefineFlat(lsh)
+        # Hand ownership of the base index to the refine index
+        lsh.this.disown()
+        index.own_fields = True
+        return index
+    
+    def _extract_hnsw(self, index: faiss.Index) -> Optional[faiss.HNSW]:
+        """
+        Get the HNSW graph of an index, looking through pre-transforms and IVF quantizers
+        
+        Args:
+            index: FAISS index
+            
+        Returns:
+            HNSW graph, or None if the index does not use one
+        """
+        index = faiss.downcast_index(index)
+        if isinstance(index, faiss.IndexPreTransform):
+            index = faiss.downcast_index(index.index)
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            index = faiss.downcast_index(ivf.quantizer)
+        return index.hnsw if isinstance(index, faiss.IndexHNSW) else None
+    
+    def _to_gpu(self, index: faiss.Index) -> faiss.Index:
+        """
+        Move an index to GPU when enabled and available
+        
+        Args:
+            index: CPU index
+            
+        Returns:
+            GPU index, or the CPU index if GPU search is disabled or not possible
+        """
+        self._on_gpu = False
+        self._cpu_index = None
+        if not Config.USE_GPU_FAISS:
+            return index
+        if not hasattr(faiss, "StandardGpuResources") or faiss.get_num_gpus() == 0:
+            logger.warning("⚠️ USE_GPU_FAISS is set but no GPU-enabled faiss build or CUDA device was found")
+            return index
+        
+        try:
+            if self._gpu_resources is None:
+                self._gpu_resources = faiss.StandardGpuResources()
+            options = faiss.GpuClonerOptions()
+            options.useFloat16 = True
+            options.usePrecomputed = True
+            gpu_index = faiss.index_cpu_to_gpu(self._gpu_resources, 0, index, options)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to move index to GPU: {e}, searching on CPU")
+            return index
+        
+        self._on_gpu = True
+        self._cpu_index = index
+        return gpu_index
+    
+    @contextmanager
+    def _index_on_cpu(self):
+        """
+        Temporarily bring the index back to CPU for mutation or saving, then push it to GPU again
+        
+        Removal, ANN rebuilds and serialization only work on CPU indexes. Nested use is a no-op.
+        Must be called with the mutation lock held; searches use the CPU index meanwhile.
+        """
+        if not self._on_gpu:
+            yield
+            return
+        
+        with self._lock.write():
+            # The CPU copy is unchanged while on GPU and has no float16 rounding
+            self.vector_store.index = self._cpu_index
+            self._on_gpu = False
+            self._cpu_index = None
+        try:
+            yield
+        finally:
+            with self._lock.write():
+                self.vector_store.index = self._to_gpu(self.vector_store.index)
+    
+    def _search_guard(self):
+        """Context manager to hold around an index search; serializes searches on GPU"""
+        return self._gpu_search_lock if self._on_gpu else nullcontext()
+    
+    def _maybe_build_ann_index(self) -> None:
+        """
+        Replace the flat index with a trained ANN index once there are enough vectors
+        
+        Below ANN_MIN_TRAIN_SIZE the IVF clusters cannot be trained well and a brute-force
+        scan is exact and fast enough, so the flat index is kept. A trained index accepts
+        further adds directly, so this only happens once. All existing vectors are added in
+        one pass, which also lets an HNSW graph be built in a single batch. Training only
+        reads the flat index, so searches keep running until the new index is swapped in.
+        Must be called with the mutation lock held.
+        """
+        index = self.vector_store.index
+        if Config.INDEX_FACTORY_STRING == "Flat":
+            return
+        if not isinstance(index, faiss.IndexFlat) or index.ntotal < Config.ANN_MIN_TRAIN_SIZE:
+            return
+        
+        try:
+            logger.info(f"Building {Config.INDEX_FACTORY_STRING} index from {index.ntotal} vectors")
+            vectors = index.reconstruct_n(0, index.ntotal)
+            ann_index = self._index_factory(index.d, index.metric_type)
+            hnsw = self._extract_hnsw(ann_index)
+            if hnsw is not None:
+                hnsw.efConstruction = Config.EF_CONSTRUCTION
+            ann_index.train(vectors)
+            ann_index.add(vectors)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to build ANN index: {e}, keeping flat index")
+            return
+        
+        self._configure_index(ann_index)
+        with self._lock.write():
+            self.vector_store.index = ann_index
+        logger.info(f"✅ ANN index built (nprobe={Config.NPROBE}, efSearch={Config.EF_SEARCH})")
+    
+    def _remove_from_index(self, ids: List[str]) -> None:
+        """
+        Remove documents from the FAISS index and docstore
+        
+        A flat index compacts positions on removal, which is what the LangChain wrapper
+        expects. IVF and other code-based indexes remove in place via _remove_positions;
+        only HNSW, which cannot remove, is rebuilt from the remaining vectors.
+        
+        Args:
+            ids: List of document IDs to remove
+        """
+        with self._mutation_lock, self._index_on_cpu():
+            self._ensure_writable()
+            with self._lock.write():
+                # Looked up before the docstore entries are gone
+                keys = [self._source_key(id) for id in ids]
+                
+                index = self.vector_store.index
+                if isinstance(index, faiss.IndexFlat):
+                    self.vector_store.delete(ids=ids)
+                else:
+                    to_delete = set(ids)
+                    positions = np.array(sorted(
+                        position for position, doc_id in self.vector_store.index_to_docstore_id.items()
+                        if doc_id in to_delete
+                    ), dtype=np.int64)
+                    if len(positions) != len(to_delete):
+                        raise ValueError("Some specified ids do not exist in the current store")
+                    
+                    if _supports_removal(index):
+                        _remove_positions(index, positions)
+                    else:
+                        keep = np.setdiff1d(np.arange(index.ntotal), positions)
+                        vectors = index.reconstruct_n(0, index.ntotal)[keep]
+                        # reset() keeps any trained quantizer, so re-adding needs no retraining
+                        index.reset()
+                        index.add(vectors)
+                        self._configure_index(index)
+                    
+                    self.vector_store.docstore.delete(ids)
+                    self.vector_store.index_to_docstore_id = {
+                        i: doc_id for i, doc_id in enumerate(
+                            doc_id for _, doc_id in sorted(self.vector_store.index_to_docstore_id.items())
+                            if doc_id not in to_delete
+                        )
+                    }
+                
+                # Only once the removal succeeded, so a failed delete can be retried by source
+                for id, key in zip(ids, keys):
+                    source_ids = self._source_to_ids.get(key)
+                    if source_ids is not None:
+                        source_ids.discard(id)
+                        if not source_ids:
+                            del self._source_to_ids[key]
+                self._mark_changed()
+    
     def get_retriever(self, k: int = None):
         """
         Get retriever
@@ -81,16 +678,29 @@ class FAISSVectorStore:
         Returns:
             Retriever instance
         """
-        search_kwargs = {"k": k or Config.TOP_K}
-        return self.vector_store.as_retriever(search_type="mmr",search_kwargs=search_kwargs)
+        search_kwargs = {
+            "k": k or Config.TOP_K,
+            "fetch_k": Config.TOP_K_FETCH,
+            "lambda_mult": Config.MMR_LAMBDA,
+        }
+        return self.vector_store.as_retriever(search_type="mmr", search_kwargs=search_kwargs)
     
-    def add_documents(self, documents: List[Document], batch_size: int = 10, ids: Optional[List[str]] = None) -> bool:
+    def add_documents(
+        self,
+        documents: List[Document],
+        batch_size: Optional[int] = None,
+        ids: Optional[List[str]] = None
+    ) -> bool:
         """
         Add documents to vector store
         
+        Chunks are embedded in EMBED_BATCH_SIZE batches on a small thread pool, up to two
+        batches ahead, while the main thread adds finished batches to the index in order,
+        so index adds overlap with embedding requests.
+        
         Args:
             documents: List of document chunks to add
-            batch_size: Batch processing size
+            batch_size: Embedding batch size, defaults to EMBED_BATCH_SIZE
             ids: Optional list of document IDs, if provided, length must match documents
             
         Returns:
@@ -100,15 +710,32 @@ class FAISSVectorStore:
             logger.warning("⚠️ No documents to add")
             return False
         
+        with self._mutation_lock:
+            return self._add_documents(documents, batch_size or Config.EMBED_BATCH_SIZE, ids)
+    
+    def _add_documents(self, documents: List[Document], batch_size: int, ids: Optional[List[str]]) -> bool:
+        """Body of add_documents, called with the mutation lock held"""
         # Generate document IDs
         if ids is None:
-            # Generate an ID for each document, format: source_file_path_UUID
+            # Content-addressed IDs: chunks already in the store (or repeated in this batch) are skipped
+            new_documents = []
             generated_ids = []
+            seen = set()
             for doc in documents:
                 source = doc.metadata.get("file_name", "")
-                doc_uuid = str(uuid.uuid4())
-                generated_ids.append(f"{source}_{doc_uuid}")
-            ids = generated_ids
+                id = chunk_id(source, doc.page_content)
+                key = id[:16]
+                if id in seen or id in self._source_to_ids.get(key, ()):
+                    continue
+                seen.add(id)
+                new_documents.append(doc)
+                generated_ids.append(id)
+            
+            if len(new_documents) < len(documents):
+                logger.info(f"Skipping {len(documents) - len(new_documents)} chunks already in the vector store")
+            if not new_documents:
+                return True
+            documents, ids = new_documents, generated_ids
         
         # Ensure document and ID counts match
         if len(documents) != len(ids):
@@ -116,31 +743,76 @@ class FAISSVectorStore:
             logger.error(error_msg)
             raise ValueError(error_msg)
         
-        # Use document loader service's batch processing capability
-        loader = get_document_loader()
-        batches = loader.batch_process_documents(documents, batch_size)
-        id_batches = [ids[i:i+batch_size] for i in range(0, len(ids), batch_size)]
-        logger.info(f"✅ Document batching complete: {len(batches)} batches")
-        
-        # Vectorize and merge into vector store (using pre-divided batches)
-        for i, (batch, batch_ids) in enumerate(zip(batches, id_batches)):
-            if self.vector_store is None:
-                self.vector_store = FAISS.from_documents(batch, self.embeddings, ids=batch_ids)
-            else:
-                # Use add_documents instead of from_documents and merge_from to pass IDs
-                self.vector_store.add_documents(documents=batch, ids=batch_ids)
-            logger.info(f"✅ Processed batch {i+1}/{len(batches)}")
-        
-        # Save updated vector store locally
-        if self.vector_store:
-            self.vector_store.save_local(str(FAISS_INDEX_PATH))
+        texts = [doc.page_content for doc in documents]
+        starts = iter(range(0, len(texts), batch_size))
+        
+        with self._index_on_cpu(), ThreadPoolExecutor(max_workers=2, thread_name_prefix="embed") as executor:
+            self._ensure_writable()
+            pending = deque()
+            
+            def submit_next() -> None:
+                start = next(starts, None)
+                if start is not None:
+                    pending.append((start, executor.submit(self._embed_batch, texts[start:start + batch_size])))
+            
+            submit_next()
+            submit_next()
+            added = 0
+            try:
+                while pending:
+                    start, future = pending.popleft()
+                    # Searches keep running while the next batches are embedded
+                    vectors = future.result()
+                    submit_next()
+                    end = start + len(vectors)
+                    with self._lock.write():
+                        index = self.vector_store.index
+                        if index.ntotal == 0 and vectors.shape[1] != index.d:
+                            # EMBEDDING_DIM did not match the model; nothing is stored yet, so resize
+                            logger.warning(f"⚠️ Embeddings have {vectors.shape[1]} dimensions, not {index.d}; set EMBEDDING_DIM")
+                            self.vector_store.index = faiss.IndexFlat(vectors.shape[1], index.metric_type)
+                        self.vector_store.add_embeddings(
+                            text_embeddings=list(zip(texts[start:end], vectors)),
+                            metadatas=[doc.metadata for doc in documents[start:end]],
+                            ids=ids[start:end]
+                        )
+                        for doc, id in zip(documents[start:end], ids[start:end]):
+                            self._source_to_ids[_chunk_source_key(id, doc.metadata)].add(id)
+                    added = end
+            finally:
+                # Batches added before a failure are already searchable, so caches must see them
+                # and the next flush must save them
+                if added:
+                    with self._lock.write():
+                        self._mark_changed()
+            logger.info(f"✅ Embedded and indexed {len(texts)} chunks")
+            
+            self._maybe_build_ann_index()
+            
+            # Save updated vector store locally
+            self.save()
             logger.info(f"✅ Vector store update complete, saved to: {FAISS_INDEX_PATH}")
-            return True
         
-        return False
+        return True
     
 
     
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of chunk texts for the index
+        
+        Args:
+            texts: Chunk texts
+            
+        Returns:
+            float32 matrix, L2-normalized for inner-product stores
+        """
+        vectors = _to_f32(self.embeddings.embed_documents(texts))
+        if self._normalizes():
+            # Unit vectors make inner product equal to cosine similarity
+            faiss.normalize_L2(vectors)
+        return vectors
+    
     def search(self, query: str, k: int = None) -> List[Document]:
         """
         Search for relevant documents
@@ -152,7 +824,116 @@ class FAISSVectorStore:
         Returns:
             List of relevant documents
         """
-        return self.vector_store.similarity_search(query, k=k or Config.TOP_K)
+        return [doc for doc, _ in self._hydrate(self._search_cached(query, k or Config.TOP_K, self.version))]
+    
+    def _raw_search(self, query: str, k: int, version: int) -> tuple:
+        """
+        Search the FAISS index directly and keep only document IDs and scores, for caching
+        
+        The query vector is copied into the calling thread's preallocated buffer. FAISS
+        releases the GIL while searching, so searches from several sessions run in parallel.
+        
+        Args:
+            query: Query text
+            k: Number of documents to return
+            version: Store version the result is cached under; not used by the search itself
+            
+        Returns:
+            Tuple of (document ID, score) pairs
+        """
+        # An empty store has nothing to find; also skips the embedding request
+        if self.vector_store.index.ntotal == 0:
+            return ()
+        vector = self.embeddings.embed_query(query)
+        query_buf = getattr(self._query_local, "buf", None)
+        if query_buf is None or query_buf.shape[1] != self.dim:
+            query_buf = self._query_local.buf = np.empty((1, self.dim), dtype=np.float32)
+        np.copyto(query_buf[0], vector)
+        if self._normalizes():
+            faiss.normalize_L2(query_buf)
+        
+        with self._lock.read(), self._search_guard():
+            scores, indices = self.vector_store.index.search(query_buf, k)
+            
+            index_to_docstore_id = self.vector_store.index_to_docstore_id
+            return tuple(
+                (index_to_docstore_id[int(i)], float(score))
+                for score, i in zip(scores[0], indices[0])
+                if i != -1
+            )
+    
+    def _hydrate(self, hits: tuple) -> List[tuple]:
+        """
+        Look up cached search hits in the docstore
+        
+        Hits deleted since the search ran are dropped.
+        
+        Args:
+            hits: Tuple of (document ID, score) pairs
+            
+        Returns:
+            List of (document, score) tuples
+        """
+        with self._lock.read():
+            results = [(self.vector_store.docstore.search(doc_id), score) for doc_id, score in hits]
+        # The docstore returns a "not found" message instead of raising for missing IDs
+        return [(doc, score) for doc, score in results if isinstance(doc, Document)]
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = None,
+        fetch_k: int = None,
+        lambda_mult: float = None
+    ) -> List[List[Document]]:
+        """
+        Search for several queries at once, using MMR like the retriever
+        
+        All queries are embedded in one request and searched in one FAISS call;
+        MMR re-ranking of each query's candidates then runs in-process.
+        
+        Args:
+            queries: Query texts
+            k: Number of documents to return per query, defaults to value in configuration
+            fetch_k: Number of candidates fetched per query before MMR, defaults to value in configuration
+            lambda_mult: MMR diversity factor (0 = max diversity, 1 = min diversity), defaults to value in configuration
+            
+        Returns:
+            List of relevant documents for each query, in query order
+        """
+        k = k or Config.TOP_K
+        fetch_k = max(fetch_k or Config.TOP_K_FETCH, k)
+        lambda_mult = Config.MMR_LAMBDA if lambda_mult is None else lambda_mult
+        if self.vector_store.index.ntotal == 0:
+            return [[] for _ in queries]
+        # Query-caching embeddings only send the misses
+        embed_queries = getattr(self.embeddings, "embed_queries", self.embeddings.embed_documents)
+        query_vectors = _to_f32(embed_queries(queries))
+        if self._normalizes():
+            faiss.normalize_L2(query_vectors)
+        
+        with self._lock.read():
+            with self._search_guard():
+                _, indices = self.vector_store.index.search(query_vectors, fetch_k)
+            # GPU clones do not reliably support reconstruct and store float16 vectors
+            index = self._cpu_index if self._on_gpu else self.vector_store.index
+            
+            results = []
+            for query_vector, row in zip(query_vectors, indices):
+                candidates = [int(i) for i in row if i != -1]
+                if not candidates:
+                    results.append([])
+                    continue
+                
+                candidate_vectors = [index.reconstruct(i) for i in candidates]
+                selected = maximal_marginal_relevance(
+                    query_vector[np.newaxis, :], candidate_vectors, k=k, lambda_mult=lambda_mult
+                )
+                results.append([
+                    self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[candidates[j]])
+                    for j in selected
+                ])
+            return results
     
     def search_with_score(self, query: str, k: int = None) -> List[tuple]:
         """
@@ -163,20 +944,80 @@ class FAISSVectorStore:
             k: Number of documents to return, defaults to value in configuration
             
         Returns:
-            List of (document, score) tuples
+            List of (document, score) tuples; the score is the cosine similarity (higher is
+            more similar), or the L2 distance for stores created before inner product was used
         """
-        return self.vector_store.similarity_search_with_score(query, k=k or Config.TOP_K)
+        return self._hydrate(self._search_cached(query, k or Config.TOP_K, self.version))
     
     def save(self, path: Optional[str] = None) -> None:
         """
         Save vector store locally
         
+        The index is written with faiss.write_index and the chunks in the memory-mappable
+        MmapDocstore format, avoiding pickle. Each save writes a new store directory and then
+        switches the CURRENT pointer to it with one os.replace, so a crash mid-save leaves the
+        previous store intact and never a mix of old and new files.
+        
         Args:
             path: Save path, defaults to path in configuration
         """
-        save_path = path or str(FAISS_INDEX_PATH)
-        self.vector_store.save_local(save_path)
-        logger.info(f"✅ Vector store saved to: {save_path}")
+        save_path = Path(path or FAISS_INDEX_PATH)
+        save_path.mkdir(parents=True, exist_ok=True)
+        is_default = save_path.resolve() == Path(FAISS_INDEX_PATH).resolve()
+        # Mutations are excluded by the mutation lock, so searches can keep running while writing
+        with self._mutation_lock, self._index_on_cpu():
+            store_dir = Path(tempfile.mkdtemp(prefix=STORE_DIR_PREFIX, dir=save_path))
+            try:
+                faiss.write_index(self.vector_store.index, str(store_dir / "index.faiss"))
+                self._write_docstore(store_dir)
+                (store_dir / SOURCE_INDEX_FILE).write_text(
+                    json.dumps({key: sorted(ids) for key, ids in self._source_to_ids.items()}),
+                    encoding="utf-8"
+                )
+                pointer_tmp = save_path / f"{CURRENT_FILE}.tmp"
+                pointer_tmp.write_text(store_dir.name, encoding="utf-8")
+                os.replace(pointer_tmp, save_path / CURRENT_FILE)
+            except Exception:
+                shutil.rmtree(store_dir, ignore_errors=True)
+                raise
+            
+            if is_default:
+                self._store_dir = store_dir
+                self._dirty = False
+                # Serve chunks from the files just written, so chunks added since loading (or all
+                # of them, for a store created empty) leave the Python heap
+                docstore = MmapDocstore(store_dir)
+                with self._lock.write():
+                    self.vector_store.docstore = docstore
+            
+            # Earlier stores are no longer referenced; files still mapped elsewhere stay readable
+            # until unmapped, and anything that cannot be removed yet is retried on the next save
+            for old_dir in save_path.glob(f"{STORE_DIR_PREFIX}*"):
+                if old_dir != store_dir:
+                    shutil.rmtree(old_dir, ignore_errors=True)
+            for name in LEGACY_FILES:
+                (save_path / name).unlink(missing_ok=True)
+        logger.info(f"✅ Vector store saved to: {store_dir}")
+    
+    def _write_docstore(self, path: Path) -> None:
+        """
+        Write the chunks in index position order
+        
+        Args:
+            path: Output directory
+        """
+        index_to_docstore_id = self.vector_store.index_to_docstore_id
+        docstore = self.vector_store.docstore
+        write_mmap_docstore(path, (
+            (index_to_docstore_id[position], docstore.search(index_to_docstore_id[position]))
+            for position in range(len(index_to_docstore_id))
+        ))
+    
+    def flush(self) -> None:
+        """Save pending changes from delete/clear calls made with flush=False"""
+        with self._mutation_lock:
+            if self._dirty:
+                self.save()
     
     # def load_documents_and_update(self, document_paths: List[str]) -> bool:
     #     """
@@ -208,31 +1049,44 @@ class FAISSVectorStore:
 
     # 假设 vector_store 是你已加载的 LangChain FAISS 对象
     # e.g., vector_store = FAISS(...)
-    def clear(self) -> None:
+    def clear(self, flush: bool = True) -> None:
+        """
+        Remove all documents from vector store
+        
+        Args:
+            flush: Save to disk immediately; pass False and call flush() to batch several changes
+        """
         # 1) Clear underlying faiss index (memory)
-        import faiss
-        from langchain_community.docstore.in_memory import InMemoryDocstore
-        index: faiss.Index = self.vector_store.index
-        index.reset()  # Clear all vectors (ntotal will become 0)
+        with self._mutation_lock, self._index_on_cpu():
+            with self._lock.write():
+                # A fresh flat index, as for a new store: reset() would keep a trained index's
+                # quantizer (or a legacy L2 metric) fitted to the old corpus
+                self.vector_store.index = faiss.IndexFlatIP(self.dim)
+                self.vector_store.distance_strategy = DistanceStrategy.MAX_INNER_PRODUCT
+                self._mmapped = False
 
-        # 2) Clear LangChain mappings and docstore (implementation dependent)
-        self.vector_store.index_to_docstore_id = {}   # Clear index->doc id mapping
-        # If there's a docstore, reset to a new empty docstore (example using InMemoryDocstore)
-        try:
-            self.vector_store.docstore = InMemoryDocstore()
-        except Exception:
-            # If reset not possible, can manually delete saved docstore file (method A)
-            pass
+                # 2) Clear LangChain mappings and docstore (implementation dependent)
+                self.vector_store.index_to_docstore_id = {}   # Clear index->doc id mapping
+                self._source_to_ids = defaultdict(set)
+                # If there's a docstore, reset to a new empty docstore (example using InMemoryDocstore)
+                try:
+                    self.vector_store.docstore = InMemoryDocstore()
+                except Exception:
+                    # If reset not possible, can manually delete saved docstore file (method A)
+                    pass
+                self._mark_changed()
 
-        # 3) Save and overwrite locally (overwrite original index file/directory)
-        self.vector_store.save_local(str(FAISS_INDEX_PATH))  # Overwrite previously saved location
-        logger.info("Index has been reset and saved to faiss_index")
-    def delete(self, ids: List[str]) -> bool:
+            # 3) Save and overwrite locally (overwrite original index file/directory)
+            if flush:
+                self.save()  # Overwrite previously saved location
+        logger.info("Index has been reset")
+    def delete(self, ids: List[str], flush: bool = True) -> bool:
         """
         Delete documents with specified IDs from vector store
         
         Args:
             ids: List of document IDs to delete
+            flush: Save to disk immediately; pass False and call flush() to batch several deletions
             
         Returns:
             Whether deletion was successful
@@ -242,21 +1096,24 @@ class FAISSVectorStore:
             return False
         
         try:
-            self.vector_store.delete(ids=ids)
-            # Save updated vector store locally
-            self.save()
+            with self._mutation_lock:
+                self._remove_from_index(ids)
+                # Save updated vector store locally
+                if flush:
+                    self.save()
             logger.info(f"✅ Successfully deleted {len(ids)} documents")
             return True
         except Exception as e:
             logger.error(f"⚠️ Failed to delete documents: {e}")
             return False
     
-    def delete_by_source(self, doc_id:str) -> bool:
+    def delete_by_source(self, doc_id: Union[str, List[str]], flush: bool = True) -> bool:
         """
-        Delete documents from a specific source file from vector store
+        Delete documents from one or more source files from vector store
 
         Args:
-            doc_id: Source filename
+            doc_id: Source filename, or a list of source filenames
+            flush: Save to disk immediately; pass False and call flush() to batch several deletions
 
         Returns:
             Whether deletion was successful
@@ -266,27 +1123,22 @@ class FAISSVectorStore:
             return False
         
         try:
-            # Get all document IDs
-            all_ids = list(self.vector_store.index_to_docstore_id.values())
-            logger.debug(f"all_ids: {all_ids}")
-            
-            # Find matching IDs
-            ids_to_delete = []
-
-            for id in all_ids:
-                # Ignore UUID part
-                if id.startswith(f"{doc_id}_"):
-                    ids_to_delete.append(id)
-            
-            if not ids_to_delete:
-                logger.warning("⚠️ No matching documents found")
-                return False
-            
-            # Delete matching documents
-            self.vector_store.delete(ids=ids_to_delete)
-            
-            # Save updated vector store locally
-            self.save()
+            with self._mutation_lock:
+                # Find matching IDs in the inverted index: proportional to the chunks deleted, not the store size
+                sources = [doc_id] if isinstance(doc_id, str) else doc_id
+                hashes = frozenset(source_hash(source) for source in sources)
+                ids_to_delete = [id for key in hashes for id in self._source_to_ids.get(key, ())]
+                
+                if not ids_to_delete:
+                    logger.warning("⚠️ No matching documents found")
+                    return False
+                
+                # Delete matching documents
+                self._remove_from_index(ids_to_delete)
+                
+                # Save updated vector store locally
+                if flush:
+                    self.save()
             logger.info(f"✅ Successfully deleted {len(ids_to_delete)} documents")
             return True
         except Exception as e:
@@ -304,8 +1156,7 @@ class FAISSVectorStore:
 
 
 # Global singleton
-_vector_store_instance = None
-
+@cache_resource
 def get_faiss_vector_store() -> FAISSVectorStore:
     """
     Get FAISS vector store singleton
@@ -313,7 +1164,12 @@ def get_faiss_vector_store() -> FAISSVectorStore:
     Returns:
         FAISSVectorStore singleton instance
     """
-    global _vector_store_instance
-    if _vector_store_instance is None:
-        _vector_store_instance = FAISSVectorStore()
-    return _vector_store_instance
+    return FAISSVectorStore()
+
+# Embedding client setup and index reads are independent, so overlap them with app startup
+if Config.EAGER_LOAD:
+    _preload_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="faiss-preload")
+    _preload_futures["embeddings"] = _preload_executor.submit(get_embeddings_singleton)
+    if _saved_store_dir() is not None:
+        _preload_futures["store"] = _preload_executor.submit(_read_saved_store)
+    _preload_executor.shutdown(wait=False)
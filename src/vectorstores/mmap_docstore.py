@@ -0,0 +1,126 @@
+"""
+Memory-Mapped Docstore
+
+Keeps saved chunk texts on disk instead of in the Python heap.
+Texts are stored as one UTF-8 blob plus an offset table and memory-mapped, so the OS
+pages in only the chunks that are actually retrieved. Metadata is kept in memory.
+Chunks added or deleted after loading are tracked in memory until the next save.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+# Chunk texts, concatenated UTF-8
+TEXTS_FILE = "texts.bin"
+# int64 byte offsets into TEXTS_FILE, one per chunk plus the end offset
+OFFSETS_FILE = "offsets.u64"
+# Chunk IDs and metadata as JSON lines, in index position order
+METADATA_FILE = "metadata.jsonl"
+
+class MmapDocstore(Docstore, AddableMixin):
+    """Docstore that reads saved chunk texts from a memory map"""
+
+    def __init__(self, path: Path):
+        """
+        Open a docstore saved with write_mmap_docstore
+
+        Args:
+            path: Directory containing the docstore files
+        """
+        self._offsets = np.fromfile(path / OFFSETS_FILE, dtype=np.int64)
+        # np.memmap rejects empty files, e.g. a store whose chunks are all empty
+        if self._offsets[-1] > 0:
+            self._texts = np.memmap(path / TEXTS_FILE, dtype=np.uint8, mode="r")
+        else:
+            self._texts = np.empty(0, dtype=np.uint8)
+
+        self._ids: List[str] = []
+        self._metadata: List[dict] = []
+        with open(path / METADATA_FILE, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                self._ids.append(record["id"])
+                self._metadata.append(record["metadata"])
+        self._positions = {id: position for position, id in enumerate(self._ids)}
+
+        # Changes since loading; the saved files are never modified in place
+        self._added: Dict[str, Document] = {}
+        self._deleted = set()
+
+    @property
+    def ids(self) -> List[str]:
+        """Saved chunk IDs in index position order"""
+        return self._ids
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._added or (id in self._positions and id not in self._deleted)
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """
+        Add documents
+
+        Args:
+            texts: Document ID -> document
+        """
+        overlapping = [id for id in texts if id in self]
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self._added.update(texts)
+
+    def delete(self, ids: List) -> None:
+        """
+        Delete documents
+
+        Args:
+            ids: Document IDs
+        """
+        if not any(id in self for id in ids):
+            raise ValueError(f"Tried to delete ids that does not  exist: {ids}")
+        for id in ids:
+            if self._added.pop(id, None) is None and id in self._positions:
+                self._deleted.add(id)
+
+    def search(self, search: str) -> Union[str, Document]:
+        """
+        Look up a document, decoding its text from the memory map
+
+        Args:
+            search: Document ID
+
+        Returns:
+            Document if found, else an error message (same contract as InMemoryDocstore)
+        """
+        if search in self._added:
+            return self._added[search]
+        position = self._positions.get(search)
+        if position is None or search in self._deleted:
+            return f"ID {search} not found."
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return Document(
+            id=search,
+            page_content=self._texts[start:end].tobytes().decode("utf-8"),
+            metadata=self._metadata[position]
+        )
+
+
+def write_mmap_docstore(path: Path, documents: Iterable[Tuple[str, Document]]) -> None:
+    """
+    Write chunks in the format read by MmapDocstore
+
+    Args:
+        path: Output directory
+        documents: (document ID, document) pairs in index position order
+    """
+    offsets = [0]
+    with open(path / TEXTS_FILE, "wb") as texts, open(path / METADATA_FILE, "w", encoding="utf-8") as metadata:
+        for doc_id, doc in documents:
+            data = doc.page_content.encode("utf-8")
+            texts.write(data)
+            offsets.append(offsets[-1] + len(data))
+            # default=str keeps loader metadata that is not JSON-native (e.g. dates) saveable
+            metadata.write(json.dumps({"id": doc_id, "metadata": doc.metadata}, ensure_ascii=False, default=str) + "\n")
+    np.asarray(offsets, dtype=np.int64).tofile(path / OFFSETS_FILE)
@@ -0,0 +1,57 @@
+"""
+Tests for the batched retriever
+"""
+import threading
+
+from langchain_core.documents import Document
+
+from src.vectorstores.batched_retriever import BatchedRetriever
+
+
+class FakeStore:
+    """Stands in for FAISSVectorStore, recording each search_batch call"""
+
+    def __init__(self):
+        self.version = 0
+        self.batches = []
+
+    def search_batch(self, queries, k=None):
+        self.batches.append(list(queries))
+        return [[Document(page_content=f"{query} v{self.version}")] for query in queries]
+
+
+def test_concurrent_queries_are_coalesced():
+    store = FakeStore()
+    retriever = BatchedRetriever(store, k=1, batch_window_ms=300)
+    queries = [f"question {i}" for i in range(4)]
+    start = threading.Barrier(len(queries), timeout=5)
+    results = {}
+
+    def ask(query):
+        start.wait()
+        results[query] = retriever.retrieve(query)
+
+    threads = [threading.Thread(target=ask, args=(query,)) for query in queries]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(store.batches) == 1
+    assert sorted(store.batches[0]) == queries
+    for query in queries:
+        assert results[query][0].page_content == f"{query} v0"
+
+
+def test_results_are_cached_until_the_store_changes():
+    store = FakeStore()
+    retriever = BatchedRetriever(store, k=1, batch_window_ms=1)
+
+    first = retriever.retrieve("What is FAISS?")
+    # Same normalized query: served from the cache
+    assert retriever.invoke("  what is faiss?") == first
+    assert len(store.batches) == 1
+
+    store.version += 1
+    assert retriever.retrieve("What is FAISS?")[0].page_content == "What is FAISS? v1"
+    assert len(store.batches) == 2
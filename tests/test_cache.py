@@ -0,0 +1,75 @@
+"""
+Tests for the cache_resource fallback used when Streamlit is not installed
+"""
+import threading
+
+import pytest
+
+import src.utils.cache as cache_module
+
+
+@pytest.fixture
+def cache_resource(monkeypatch):
+    monkeypatch.setattr(cache_module, "st", None)
+    return cache_module.cache_resource
+
+
+def test_caches_per_arguments(cache_resource):
+    calls = []
+
+    @cache_resource
+    def make(name, size=1):
+        calls.append((name, size))
+        return object()
+
+    assert make("a") is make("a")
+    assert make("a", size=2) is make("a", size=2)
+    assert make("a") is not make("a", size=2)
+    assert make("b", size=1) is make("b", size=1)
+    assert calls == [("a", 1), ("a", 2), ("b", 1)]
+
+
+def test_decorator_with_options(cache_resource):
+    @cache_resource(show_spinner=False)
+    def make():
+        return object()
+
+    assert make() is make()
+
+
+def test_clear_one_entry_or_all(cache_resource):
+    @cache_resource
+    def make(name, size=1):
+        return object()
+
+    a, b = make("a", size=2), make("b")
+    make.clear("a", size=2)
+    assert make("a", size=2) is not a
+    assert make("b") is b
+
+    make.clear()
+    assert make("b") is not b
+
+
+def test_concurrent_first_calls_share_one_instance(cache_resource):
+    created = []
+    start = threading.Barrier(4, timeout=5)
+
+    @cache_resource
+    def make():
+        created.append(object())
+        return created[-1]
+
+    results = []
+
+    def call():
+        start.wait()
+        results.append(make())
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
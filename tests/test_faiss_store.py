@@ -0,0 +1,108 @@
+"""
+Tests for FAISSVectorStore persistence and deduplication
+"""
+import hashlib
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+import src.vectorstores.faiss_store as faiss_store
+from src.config import Config
+from src.vectorstores.faiss_store import CURRENT_FILE, STORE_DIR_PREFIX, FAISSVectorStore
+from src.vectorstores.mmap_docstore import METADATA_FILE
+
+DIM = 32
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic embeddings derived from a hash of the text"""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def _vector(self, text):
+        seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(DIM).tolist()
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(faiss_store, "FAISS_INDEX_PATH", tmp_path)
+    monkeypatch.setattr(Config, "EMBEDDING_DIM", DIM)
+    monkeypatch.setattr(Config, "FAISS_MMAP", False)
+    return tmp_path
+
+
+def make_docs(source, n):
+    return [Document(page_content=f"{source} chunk {i}", metadata={"file_name": source}) for i in range(n)]
+
+
+def store_dirs(path):
+    return sorted(p.name for p in path.glob(f"{STORE_DIR_PREFIX}*"))
+
+
+def test_save_switches_current_pointer(store_path):
+    # Left behind by a save that crashed before switching the pointer
+    (store_path / f"{STORE_DIR_PREFIX}crashed").mkdir()
+
+    store = FAISSVectorStore(embeddings=FakeEmbeddings())
+    store.add_documents(make_docs("a.txt", 3))
+    first = (store_path / CURRENT_FILE).read_text(encoding="utf-8")
+    assert store_dirs(store_path) == [first]
+
+    store.add_documents(make_docs("b.txt", 2))
+    second = (store_path / CURRENT_FILE).read_text(encoding="utf-8")
+    assert second != first
+    assert store_dirs(store_path) == [second]
+
+    reopened = FAISSVectorStore(embeddings=FakeEmbeddings())
+    assert reopened.vector_store.index.ntotal == 5
+    assert reopened.search("b.txt chunk 1", k=1)[0].page_content == "b.txt chunk 1"
+
+
+def test_count_mismatch_is_not_loaded(store_path):
+    store = FAISSVectorStore(embeddings=FakeEmbeddings())
+    store.add_documents(make_docs("a.txt", 3))
+    store_dir = store_path / (store_path / CURRENT_FILE).read_text(encoding="utf-8")
+    with open(store_dir / METADATA_FILE, "a", encoding="utf-8") as f:
+        f.write('{"id": "orphan", "metadata": {}}\n')
+
+    with pytest.raises(ValueError):
+        faiss_store._read_saved_store(store_dir)
+
+    # Positions would point at the wrong chunks, so the store starts empty instead
+    reopened = FAISSVectorStore(embeddings=FakeEmbeddings())
+    assert reopened.vector_store.index.ntotal == 0
+
+
+def test_add_skips_chunks_already_stored(store_path):
+    embeddings = FakeEmbeddings()
+    store = FAISSVectorStore(embeddings=embeddings)
+
+    docs = make_docs("a.txt", 3)
+    assert store.add_documents(docs + [docs[0]])
+    assert store.vector_store.index.ntotal == 3
+    assert embeddings.embedded == 3
+
+    # Re-uploading the same file embeds nothing
+    assert store.add_documents(make_docs("a.txt", 3))
+    assert store.vector_store.index.ntotal == 3
+    assert embeddings.embedded == 3
+
+    # Same text from another file is a different chunk
+    store.add_documents([Document(page_content="a.txt chunk 0", metadata={"file_name": "b.txt"})])
+    assert store.vector_store.index.ntotal == 4
+
+    assert store.delete_by_source("a.txt")
+    assert store.vector_store.index.ntotal == 1
+    store.add_documents(make_docs("a.txt", 1))
+    assert store.vector_store.index.ntotal == 2
@@ -0,0 +1,58 @@
+"""
+Tests for the memory-mapped docstore
+"""
+import pytest
+from langchain_core.documents import Document
+
+from src.vectorstores.mmap_docstore import MmapDocstore, write_mmap_docstore
+
+
+def make_docs():
+    return [
+        ("id-a", Document(page_content="first chunk", metadata={"file_name": "a.txt"})),
+        ("id-b", Document(page_content="", metadata={"file_name": "a.txt", "page": 2})),
+        ("id-c", Document(page_content="第三段 – non-ASCII", metadata={"file_name": "c.md"})),
+    ]
+
+
+def test_round_trip(tmp_path):
+    write_mmap_docstore(tmp_path, make_docs())
+    docstore = MmapDocstore(tmp_path)
+
+    assert docstore.ids == ["id-a", "id-b", "id-c"]
+    for doc_id, expected in make_docs():
+        doc = docstore.search(doc_id)
+        assert doc.id == doc_id
+        assert doc.page_content == expected.page_content
+        assert doc.metadata == expected.metadata
+    assert docstore.search("missing") == "ID missing not found."
+
+
+def test_add_and_delete(tmp_path):
+    write_mmap_docstore(tmp_path, make_docs())
+    docstore = MmapDocstore(tmp_path)
+
+    docstore.add({"id-d": Document(page_content="added", metadata={})})
+    assert docstore.search("id-d").page_content == "added"
+    with pytest.raises(ValueError):
+        docstore.add({"id-a": Document(page_content="duplicate")})
+
+    docstore.delete(["id-a", "id-d"])
+    assert "id-a" not in docstore
+    assert docstore.search("id-a") == "ID id-a not found."
+    assert docstore.search("id-d") == "ID id-d not found."
+    assert docstore.search("id-c").page_content == "第三段 – non-ASCII"
+    with pytest.raises(ValueError):
+        docstore.delete(["id-a"])
+
+    # The saved files are not modified, so reopening shows the saved chunks again
+    assert MmapDocstore(tmp_path).search("id-a").page_content == "first chunk"
+
+
+def test_empty_store(tmp_path):
+    write_mmap_docstore(tmp_path, [])
+    docstore = MmapDocstore(tmp_path)
+
+    assert docstore.ids == []
+    docstore.add({"id-a": Document(page_content="only chunk")})
+    assert docstore.search("id-a").page_content == "only chunk"
@@ -0,0 +1,97 @@
+"""
+Tests for the reader/writer lock
+"""
+import threading
+import time
+
+from src.utils.rwlock import ReadWriteLock
+
+TIMEOUT = 5
+
+
+def run(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_inside = threading.Barrier(2, timeout=TIMEOUT)
+
+    def reader():
+        with lock.read():
+            both_inside.wait()
+
+    threads = [run(reader), run(reader)]
+    for thread in threads:
+        thread.join(TIMEOUT)
+    assert not any(thread.is_alive() for thread in threads)
+    assert not both_inside.broken
+
+
+def test_writer_excludes_readers():
+    lock = ReadWriteLock()
+    entered = threading.Event()
+
+    def reader():
+        with lock.read():
+            entered.set()
+
+    with lock.write():
+        thread = run(reader)
+        assert not entered.wait(0.2)
+    assert entered.wait(TIMEOUT)
+    thread.join(TIMEOUT)
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = ReadWriteLock()
+    order = []
+    release_first_reader = threading.Event()
+    first_reader_inside = threading.Event()
+
+    def first_reader():
+        with lock.read():
+            first_reader_inside.set()
+            release_first_reader.wait(TIMEOUT)
+
+    def writer():
+        with lock.write():
+            order.append("writer")
+
+    def late_reader():
+        with lock.read():
+            order.append("reader")
+
+    threads = [run(first_reader)]
+    assert first_reader_inside.wait(TIMEOUT)
+    threads.append(run(writer))
+    # Give the writer time to start waiting before the late reader arrives
+    time.sleep(0.1)
+    threads.append(run(late_reader))
+    time.sleep(0.1)
+    assert order == []
+
+    release_first_reader.set()
+    for thread in threads:
+        thread.join(TIMEOUT)
+    assert order == ["writer", "reader"]
+
+
+def test_write_is_reentrant_and_may_read():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+
+    # Fully released: another thread can take it
+    acquired = threading.Event()
+
+    def writer():
+        with lock.write():
+            acquired.set()
+
+    run(writer).join(TIMEOUT)
+    assert acquired.is_set()